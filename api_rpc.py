@@ -0,0 +1,194 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import socket
+from functools import partial
+
+log = logging.getLogger("discord")
+
+MAX_MESSAGE_SIZE = 64 * 1024
+
+compact_dumps = partial(json.dumps, separators=(",", ":"))
+
+
+class RPCError(Exception):
+    """Raised by RPCClient.call when the bot could not be reached or could not answer."""
+
+
+class RPCServer:
+    """
+    Answers calls from API worker processes over a Unix socket.
+
+    Every message is one line of JSON. A call is {"id": 1, "method": "...",
+    "params": {...}} and is answered with {"id": 1, "result": ...} or
+    {"id": 1, "error": "..."}. Calls on one connection run concurrently and
+    are answered in the order they finish.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the socket. A stale socket left by a previous run is replaced.
+        Only the bot's own user may connect, since callers can DM members.
+    methods : dict
+        Maps method names to coroutine functions that take the call's params
+        as keyword arguments and return something JSON serializable.
+    """
+
+    def __init__(self, path: str, methods: dict):
+        self.path = path
+        self.methods = methods
+        self.server: asyncio.AbstractServer | None = None
+        self.connections: set[asyncio.StreamWriter] = set()
+        self.calls = 0
+        self.errors = 0
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        # Restrict the socket before it listens, so nobody can connect while it is still open to all.
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self.path)
+            os.chmod(self.path, 0o600)
+        except OSError:
+            sock.close()
+            raise
+        self.server = await asyncio.start_unix_server(self._serve, sock=sock, limit=MAX_MESSAGE_SIZE)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+        self.connections.add(writer)
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._answer(json.loads(line), writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, ValueError) as e:
+            log.warning(f"Dropped an API worker connection: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.connections.discard(writer)
+            writer.close()
+
+    async def _answer(self, call: dict, writer: asyncio.StreamWriter):
+        self.calls += 1
+        reply = {"id": call.get("id")}
+
+        method = self.methods.get(call.get("method"))
+        if method is None:
+            reply["error"] = f"Unknown method {call.get('method')!r}"
+        else:
+            try:
+                reply["result"] = await method(**call.get("params", {}))
+            except Exception as e:
+                log.exception(f"RPC call {call.get('method')} failed")
+                reply["error"] = f"{e.__class__.__name__}: {e}"
+
+        if "error" in reply:
+            self.errors += 1
+        if not writer.is_closing():
+            writer.write(compact_dumps(reply).encode() + b"\n")
+            await writer.drain()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            for writer in self.connections:
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class RPCClient:
+    """
+    Calls an RPCServer over one persistent Unix socket connection, which is
+    reopened on the next call after it drops. Any number of calls can be in
+    flight at once.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the server's socket.
+    timeout : float
+        Seconds to wait for an answer before the call fails.
+    """
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        self.path = path
+        self.timeout = timeout
+
+        self.writer: asyncio.StreamWriter | None = None
+        self.pending: dict[int, asyncio.Future] = {}
+        self.listener: asyncio.Task | None = None
+        self.connecting = asyncio.Lock()
+        self.ids = itertools.count(1)
+
+    async def _connect(self):
+        async with self.connecting:
+            if self.writer is not None and not self.writer.is_closing():
+                return
+            reader, self.writer = await asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE_SIZE)
+            # Each connection has its own pending calls, so a dropped connection only fails its own.
+            self.pending = {}
+            self.listener = asyncio.create_task(self._listen(reader, self.writer, self.pending))
+
+    async def _listen(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, pending: dict):
+        try:
+            while line := await reader.readline():
+                reply = json.loads(line)
+                future = pending.pop(reply.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in reply:
+                    future.set_exception(RPCError(reply["error"]))
+                else:
+                    future.set_result(reply.get("result"))
+        except (ConnectionError, ValueError) as e:
+            log.warning(f"Lost the connection to the bot: {e}")
+        finally:
+            # Closing marks the connection dead, so the next call reconnects instead of waiting on it.
+            writer.close()
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(RPCError("Connection to the bot closed"))
+            pending.clear()
+
+    async def call(self, method: str, **params):
+        """
+        Calls `method` on the bot and returns its result.
+
+        Raises:
+        -------
+        RPCError
+            If the bot cannot be reached, does not answer in time, or the call failed.
+        """
+        try:
+            await self._connect()
+        except OSError as e:
+            raise RPCError(f"Cannot reach the bot at {self.path}: {e}") from e
+
+        call_id = next(self.ids)
+        pending = self.pending
+        future = pending[call_id] = asyncio.get_running_loop().create_future()
+        self.writer.write(compact_dumps({"id": call_id, "method": method, "params": params}).encode() + b"\n")
+
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise RPCError(f"{method} was not answered within {self.timeout} seconds") from None
+        finally:
+            pending.pop(call_id, None)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.listener is not None:
+            await asyncio.gather(self.listener, return_exceptions=True)
+            self.listener = None
@@ -0,0 +1,347 @@
+from aiohttp import web
+from functools import partial
+import json
+import time
+
+from api_rpc import RPCError
+from db_utils import get_user, get_users_by_minecraft, link_minecraft, QUERY
+from main import MAX_BULK_LOOKUP
+from password_service import PasswordServiceBusy
+from expiring_map import ExpiringMapFull
+from metrics import metrics_middleware, metrics_handler
+
+compact_dumps = partial(json.dumps, separators=(",", ":"))
+
+class APIServer:
+    """
+    HTTP API used by the Minecraft server to register and log in players.
+
+    The server only talks to Discord through `members`, so it runs the same
+    on the bot's event loop (APICog) or in its own process (api_worker.py).
+
+    Parameters:
+    -----------
+    members : object
+        Has `async lookup(identifier)`, which returns the Discord ID of a
+        member of the server or None, and `async send_otp(discord_id, otp)`.
+    pending_registrations : ExpiringMap or SQLiteRegistrations
+        Registrations waiting for OTP confirmation, keyed by Discord identifier
+        and indexed by Minecraft username.
+    passwords : PasswordService
+        Hashes and verifies passwords.
+    metrics : Metrics
+        Where requests and stage timings are recorded.
+    log : logging.Logger
+        Where registrations are reported.
+    serve_metrics : bool
+        Serve `metrics` at GET /metrics. Workers sharing a port serve them on
+        their own port instead, so every scrape reaches the same process.
+    """
+
+    def __init__(self, members, pending_registrations, passwords, metrics, log, serve_metrics: bool = True):
+        self.members = members
+        self.pending_registrations = pending_registrations
+        self.passwords = passwords
+        self.metrics = metrics
+        self.log = log
+
+        self.app = web.Application(middlewares=[metrics_middleware(self.metrics)])
+        self.app.add_routes([
+            web.post('/minecraft/verify', self.minecraft_verify_registration),
+            web.post('/minecraft/register', self.minecraft_register),
+            web.post('/minecraft/login', self.minecraft_login),
+            web.get('/minecraft/user', self.minecraft_get_user),
+            web.post('/minecraft/users', self.minecraft_get_users),
+        ])
+        if serve_metrics:
+            self.app.add_routes([web.get('/metrics', metrics_handler(self.metrics))])
+        self.runner = web.AppRunner(self.app, keepalive_timeout=75)
+
+    async def start(self, host: str, port: int, reuse_port: bool = False):
+        """Starts listening. With `reuse_port`, several processes can listen on the same port."""
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port, reuse_port=reuse_port or None)
+        await site.start()
+
+    async def close(self):
+        await self.runner.cleanup()
+
+    async def minecraft_register(self, request):
+        params = request.query
+
+        minecraft_username = params.get("minecraft_username")
+        discord_identifier = params.get("discord_identifier")
+        password = params.get("password")
+        otp = params.get("otp")
+
+        if (not minecraft_username or
+            not discord_identifier or
+            not password or
+            not otp):
+            return web.json_response(
+                {"error": "Missing parameters."},
+                status=400
+            )
+        
+        if self.pending_registrations.get(discord_identifier):
+            return web.json_response(
+                {"error": f"There is already an ongoing registration for {discord_identifier}."},
+                status=403
+            )
+
+        try:
+            with self.metrics.time_stage("member_lookup"):
+                discord_id = await self.members.lookup(discord_identifier)
+        except RPCError as e:
+            self.log.warning(f"Member lookup for {discord_identifier} failed: {e}")
+            return web.json_response(
+                {"error": "Discord bot is unavailable. Please try again."},
+                status=503
+            )
+
+        if discord_id:
+            with self.metrics.time_stage("db_lookup"):
+                discord_entry = get_user(QUERY.discord_id == int(discord_id)) or {}
+                minecraft_entry = get_user(QUERY.minecraft.username == minecraft_username) or {}
+
+            if discord_entry.get("minecraft", {}).get("linked", False):
+                return web.json_response(
+                    {"error": f"There is already a minecraft account linked to {discord_identifier}."},
+                    status=403
+                )
+            
+            if minecraft_entry.get("minecraft", {}).get("linked", False):
+                return web.json_response(
+                    {"error": f"There is already a discord account linked to {minecraft_username}."},
+                    status=403
+            )
+
+            if self.pending_registrations.full():
+                return web.json_response(
+                    {"error": "Too many pending registrations. Please try again later."},
+                    status=429
+                )
+
+            # Hashed now rather than on confirmation, so pending registrations,
+            # which API workers keep in SQLite, never hold a plain password.
+            try:
+                with self.metrics.time_stage("password_hash"):
+                    password_hash = await self.passwords.hash(password)
+            except PasswordServiceBusy:
+                return web.json_response(
+                    {"error": "Server is busy. Please try again."},
+                    status=503
+                )
+
+            registration = {
+                    "discord_id": discord_id,
+                    "minecraft_username": minecraft_username,
+                    "password_hash": password_hash,
+                    "otp": otp,
+                    "timestamp": time.time()
+                }
+
+            try:
+                with self.metrics.time_stage("dm_send"):
+                    await self.members.send_otp(discord_id, otp)
+            except RPCError as e:
+                self.log.warning(f"Sending the OTP to {discord_identifier} failed: {e}")
+                return web.json_response(
+                    {"error": "Discord bot is unavailable. Please try again."},
+                    status=503
+                )
+
+            try:
+                self.pending_registrations.set(discord_identifier, registration)
+            except ExpiringMapFull:
+                return web.json_response(
+                    {"error": "Too many pending registrations. Please try again later."},
+                    status=429
+                )
+
+            return web.json_response(
+                {
+                    "message": "Registration request accepted. Waiting for Minecraft client confirmation."
+                },
+                status=202
+            )
+        else:
+            return web.json_response(
+                {
+                    "error": "Discord account provided is not a member of the 'Let's Play' discord server. You must first join the discord server to create an account."
+                },
+                status=403
+            )
+
+    async def minecraft_verify_registration(self, request):
+        params = request.query
+        discord_identifier = params.get("discord_identifier")
+        otp_confirmed = bool(params.get("otp_confirmed"))
+
+        if not discord_identifier or not isinstance(otp_confirmed, bool) :
+            return web.json_response(
+                {"error": "Missing or invalid parameters."},
+                status=400
+            )
+
+        registration = self.pending_registrations.get(discord_identifier)
+        if not registration:
+            return web.json_response(
+                {"error": "No pending registration for this Discord user."},
+                status=404
+            )
+
+        if otp_confirmed:
+            mc_username = registration.get("minecraft_username")
+
+            with self.metrics.time_stage("db_write"):
+                link_minecraft(registration["discord_id"], 
+                               mc_username, 
+                               registration["password_hash"])
+            
+            self.log.info(f"Succesfully linked {mc_username} to {discord_identifier}")
+
+            self.pending_registrations.pop(discord_identifier)
+
+            return web.json_response(
+                {"message": "Registration completed successfully."},
+                status=201
+            )
+        else:
+            self.pending_registrations.pop(discord_identifier)
+            return web.json_response(
+                {"error": "OTP was not confirmed. Registration cancelled."},
+                status=403
+            )
+
+    async def minecraft_login(self, request):
+        params = request.query
+
+        minecraft_username = params.get("minecraft_username")
+        password = params.get("password")
+
+        if (not minecraft_username or not password):
+            return web.json_response(
+                {"error": "Missing parameters."},
+                status=400
+            )
+        
+        with self.metrics.time_stage("db_lookup"):
+            minecraft_entry = get_user(QUERY.minecraft.username==minecraft_username)
+
+        if minecraft_entry:
+            password_hash = minecraft_entry.get("minecraft", {}).get("password", None)
+
+            try:
+                with self.metrics.time_stage("password_verify"):
+                    is_valid = await self.passwords.verify(password, password_hash)
+            except PasswordServiceBusy:
+                return web.json_response(
+                    {"error": "Server is busy. Please try again."},
+                    status=503
+                )
+
+            if is_valid:
+                return web.json_response(
+                    {"message": "Login Successful"},
+                    status=200
+                )
+
+            return web.json_response(
+                {"error": "Invalid credentials."},
+                status=403
+            )
+
+        return web.json_response(
+            {"error": "Non existent account"},
+            status=404
+        )
+
+    async def minecraft_get_user(self, request):
+        params = request.query
+
+        minecraft_username = params.get("minecraft_username")
+
+        if (not minecraft_username):
+            return web.json_response(
+                {"error": "Missing parameters."},
+                status=400
+            )
+        
+        with self.metrics.time_stage("db_lookup"):
+            minecraft_entry = get_user(QUERY.minecraft.username==minecraft_username)
+
+        if minecraft_entry:
+            return web.json_response(
+                {"message": "Account exists."},
+                status=200
+            )
+        
+        if self.pending_registrations.find(minecraft_username):
+            return web.json_response(
+                {"message": "Account Registration Pending."},
+                status=201
+            )
+
+        return web.json_response(
+            {"error": "Account does not exist."},
+            status=404
+        )
+        
+
+        
+
+    async def minecraft_get_users(self, request):
+        """
+        Reports the status of many Minecraft accounts in one request.
+
+        Usernames come from a JSON body {"minecraft_usernames": [...]} or a
+        comma separated `minecraft_usernames` query parameter. Each one is
+        reported as "linked", "pending" or "missing".
+        """
+        minecraft_usernames = None
+
+        if request.can_read_body:
+            try:
+                body = await request.json()
+            except ValueError:
+                return web.json_response(
+                    {"error": "Invalid JSON body."},
+                    status=400
+                )
+            if isinstance(body, dict):
+                minecraft_usernames = body.get("minecraft_usernames")
+        elif request.query.get("minecraft_usernames"):
+            minecraft_usernames = request.query["minecraft_usernames"].split(",")
+
+        if (not isinstance(minecraft_usernames, list) or
+            not minecraft_usernames or
+            not all(isinstance(username, str) for username in minecraft_usernames)):
+            return web.json_response(
+                {"error": "Missing parameters."},
+                status=400
+            )
+
+        if len(minecraft_usernames) > MAX_BULK_LOOKUP:
+            return web.json_response(
+                {"error": f"At most {MAX_BULK_LOOKUP} usernames can be looked up at once."},
+                status=413
+            )
+
+        with self.metrics.time_stage("db_lookup"):
+            linked = get_users_by_minecraft(minecraft_usernames)
+
+        statuses = {}
+        for username in minecraft_usernames:
+            if username in linked:
+                statuses[username] = "linked"
+            elif self.pending_registrations.find(username):
+                statuses[username] = "pending"
+            else:
+                statuses[username] = "missing"
+
+        return web.json_response(
+            {"users": statuses},
+            status=200,
+            dumps=compact_dumps
+        )
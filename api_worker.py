@@ -0,0 +1,99 @@
+"""
+Serves the HTTP API in its own process, so request bursts never delay the
+Discord gateway. The bot starts API_WORKERS of these itself, but one can
+also be started by hand with `python api_worker.py` while the bot is running.
+
+Workers listen on API_PORT with SO_REUSEPORT, so the kernel spreads
+connections over them. They read and write users and pending registrations
+in the SQLite database directly and call the bot over API_RPC_SOCKET only
+to look up members and send OTP DMs.
+
+Each worker keeps its own metrics. The shared port does not serve them, since
+a scrape there could reach any worker. Instead each worker serves them on
+API_METRICS_PORT + 1 + API_WORKER_INDEX, when API_METRICS_PORT is set.
+"""
+import asyncio
+import logging
+import os
+import signal
+
+from main import (PEPPER, PASSWORD_WORKERS, PASSWORD_QUEUE_SIZE, PASSWORD_EXECUTOR, REGISTRATION_TTL,
+                  MAX_PENDING_REGISTRATIONS, API_HOST, API_PORT, API_RPC_SOCKET, API_RPC_TIMEOUT, API_METRICS_PORT)
+from db_utils import DB_BACKEND, SQLITE_PATH
+from api_rpc import RPCClient
+from api_server import APIServer
+from password_service import PasswordService
+from sqlite_store import SQLiteRegistrations
+from metrics import Metrics, start_metrics_server
+
+log = logging.getLogger("discord")
+
+# Set by the bot for the workers it starts; picks this worker's metrics port.
+API_WORKER_INDEX = int(os.getenv("API_WORKER_INDEX", "0"))
+
+
+class RPCMembers:
+    """Member lookups and OTP DMs answered by the bot process."""
+
+    def __init__(self, client: RPCClient):
+        self.client = client
+
+    async def lookup(self, identifier: str) -> int | None:
+        return await self.client.call("lookup_member", identifier=identifier)
+
+    async def send_otp(self, discord_id: int, otp: str):
+        await self.client.call("send_otp", discord_id=discord_id, otp=otp)
+
+
+async def run_worker():
+    if DB_BACKEND != "sqlite":
+        raise SystemExit("API workers need DB_BACKEND=sqlite, so they share users and pending registrations")
+
+    client = RPCClient(API_RPC_SOCKET, timeout=API_RPC_TIMEOUT)
+    metrics = Metrics()
+    pending_registrations = SQLiteRegistrations(
+        SQLITE_PATH,
+        ttl=REGISTRATION_TTL,
+        capacity=MAX_PENDING_REGISTRATIONS,
+        on_expire=lambda discord_identifier, registration: log.info(
+            f"[Auto-Cleanup] Removed expired registration for {discord_identifier}")
+    )
+    passwords = PasswordService(
+        PEPPER,
+        workers=PASSWORD_WORKERS,
+        max_queue=PASSWORD_QUEUE_SIZE,
+        use_processes=PASSWORD_EXECUTOR == "process"
+    )
+    metrics.register_gauge("password_in_flight", "Password operations submitted and not finished.",
+                           lambda: passwords.in_flight)
+    metrics.register_gauge("pending_registrations", "Registrations waiting for OTP confirmation.",
+                           lambda: len(pending_registrations))
+
+    server = APIServer(RPCMembers(client), pending_registrations, passwords, metrics, log, serve_metrics=False)
+    await server.start(API_HOST, API_PORT, reuse_port=True)
+    log.info(f"API worker {os.getpid()} listening on {API_HOST}:{API_PORT}")
+
+    metrics_runner = None
+    if API_METRICS_PORT:
+        metrics_port = API_METRICS_PORT + 1 + API_WORKER_INDEX
+        metrics_runner = await start_metrics_server(metrics, API_HOST, metrics_port)
+        log.info(f"API worker {os.getpid()} serving metrics on {API_HOST}:{metrics_port}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+
+    await server.close()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+    pending_registrations.stop()
+    passwords.shutdown()
+    await client.close()
+    log.info(f"API worker {os.getpid()} stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-8s %(name)s: %(message)s")
+    asyncio.run(run_worker())
@@ -0,0 +1,142 @@
+import asyncio
+from collections import deque
+
+from discord import HTTPException
+
+from outbound import AUDIT
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+class AuditLog:
+    """
+    Queue of audit log embeds that are sent to a channel in batches of up to
+    10 embeds per message, instead of one message per record. Batches go
+    through `bot.outbound` at the lowest priority.
+
+    Records are queued without waiting on Discord. A background task sends them
+    every `flush_interval` seconds, or sooner once a full batch is waiting. If
+    more than `max_queue` records are waiting, new ones are dropped and counted
+    rather than slowing down the commands that produce them.
+
+    Parameters:
+    -----------
+    bot : Bot
+        The bot whose channel cache and logger are used.
+    channel_id : int
+        Channel the records are sent to.
+    flush_interval : float
+        Longest time in seconds a record waits before it is sent.
+    max_queue : int
+        Most records kept waiting.
+    """
+
+    def __init__(self, bot, channel_id: int, flush_interval: float = 5.0, max_queue: int = 500):
+        self.bot = bot
+        self.channel_id = channel_id
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+
+        self.queue: deque = deque()
+        self.wakeup = asyncio.Event()
+        self.flusher: asyncio.Task | None = None
+        self.sent = 0
+        self.messages = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def record(self, embed) -> bool:
+        """Queues an embed. Returns False if it was dropped because the queue is full."""
+        if len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                self.bot.log.warning(f"Audit log queue is full, {self.dropped} record(s) dropped so far")
+            return False
+
+        self.queue.append(embed)
+        if len(self.queue) >= MAX_EMBEDS_PER_MESSAGE:
+            self.wakeup.set()
+
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.get_running_loop().create_task(self._run())
+        return True
+
+    def _next_batch(self) -> list:
+        batch = []
+        chars = 0
+        while self.queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            length = len(self.queue[0])
+            if batch and chars + length > MAX_EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(self.queue.popleft())
+            chars += length
+        return batch
+
+    async def flush(self) -> int:
+        """Sends every queued record now and returns how many were sent."""
+        channel = self.bot.get_channel(self.channel_id)
+        if channel is None:
+            # Nothing can be sent, so drop what is queued instead of retrying it forever.
+            if self.queue:
+                self.dropped += len(self.queue)
+                self.bot.log.warning(f"Audit log channel {self.channel_id} not found, "
+                                     f"dropped {len(self.queue)} record(s)")
+                self.queue.clear()
+            return 0
+
+        sent = 0
+        while self.queue:
+            batch = self._next_batch()
+            try:
+                await self.bot.outbound.send(channel, embeds=batch, priority=AUDIT)
+            except HTTPException as e:
+                self.failed += len(batch)
+                self.bot.log.warning(f"Failed to send {len(batch)} audit log record(s): {e}")
+                continue
+            except asyncio.CancelledError:
+                self.failed += len(batch)
+                raise
+            sent += len(batch)
+            self.messages += 1
+
+        self.sent += sent
+        return sent
+
+    async def _run(self):
+        while self.queue:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    async def close(self, timeout: float = 10.0):
+        """
+        Sends whatever is still queued, waiting at most `timeout` seconds.
+        Records that cannot be sent in time are counted as dropped.
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        try:
+            if self.flusher is not None and not self.flusher.done():
+                self.wakeup.set()
+                await asyncio.wait_for(self.flusher, timeout)
+            await asyncio.wait_for(self.flush(), max(0.0, deadline - asyncio.get_running_loop().time()))
+        except asyncio.TimeoutError:
+            self.bot.log.warning(f"Audit log flush timed out after {timeout}s")
+
+        self.dropped += len(self.queue)
+        self.queue.clear()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self.queue),
+            "sent": self.sent,
+            "messages": self.messages,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
@@ -0,0 +1,14 @@
+"""
+Offline benchmarks and load tools. Importing the package points the project
+at a throwaway database and gives the API a pepper, before any project module
+reads its configuration.
+"""
+import os
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix="lpsm-bench-")
+os.environ["DATABASE_PATH"] = os.path.join(WORKDIR, "database.json")
+os.environ["SQLITE_PATH"] = os.path.join(WORKDIR, "database.sqlite3")
+os.environ["SYNC_CHECKPOINT_PATH"] = os.path.join(WORKDIR, "sync_checkpoint.json")
+os.environ["DB_BACKEND"] = "tinydb"
+os.environ.setdefault("PASSWORD_PEPPER", "benchmark-pepper")
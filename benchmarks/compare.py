@@ -0,0 +1,53 @@
+"""
+Compares two benchmark result files and prints the change in median time.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.1]
+"""
+import argparse
+import json
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as handle:
+        report = json.load(handle)
+
+    return {
+        (result["group"], result["name"], result.get("backend", ""), result.get("size", "")): result
+        for result in report["results"]
+    }
+
+
+def compare(baseline_path: str, candidate_path: str, threshold: float):
+    baseline = load(baseline_path)
+    candidate = load(candidate_path)
+
+    print(f"{'benchmark':<52} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for key in sorted(baseline.keys() | candidate.keys(), key=lambda k: tuple(map(str, k))):
+        name = " ".join(str(part) for part in key if part != "")
+        old = baseline.get(key, {}).get("median_s")
+        new = candidate.get(key, {}).get("median_s")
+
+        if old is None or new is None:
+            status = "only in baseline" if new is None else "only in candidate"
+            print(f"{name:<52} {status:>35}")
+            continue
+
+        change = (new - old) / old if old else 0.0
+        marker = ""
+        if change > threshold:
+            marker = "  slower"
+        elif change < -threshold:
+            marker = "  faster"
+        print(f"{name:<52} {old * 1e6:>10.1f}us {new * 1e6:>10.1f}us {change:>+8.1%}{marker}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", default=0.1, type=float,
+                        help="Relative change in median time to flag as slower or faster.")
+    args = parser.parse_args()
+
+    compare(args.baseline, args.candidate, args.threshold)
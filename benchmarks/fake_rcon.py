@@ -0,0 +1,175 @@
+"""
+In-process stand-in for a Minecraft server's RCON endpoint (Source RCON
+protocol), with scripted responses and fault injection.
+
+    server = FakeRCONServer(password="secret", loader="fabric", players=["Steve"])
+    port = await server.start()
+    ...
+    await server.close()
+"""
+import asyncio
+import random
+import struct
+
+SERVERDATA_RESPONSE_VALUE = 0
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_AUTH = 3
+
+UNKNOWN_COMMAND = "Unknown or incomplete command, see below for error"
+DIMENSIONS = ("overworld", "the_nether", "the_end")
+
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    data = struct.pack("<ii", request_id, packet_type) + body.encode("utf-8") + b"\x00\x00"
+    return struct.pack("<i", len(data)) + data
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[int, int, str]:
+    length = struct.unpack("<i", await reader.readexactly(4))[0]
+    data = await reader.readexactly(length)
+    request_id, packet_type = struct.unpack("<ii", data[:8])
+    return request_id, packet_type, data[8:-2].decode("utf-8")
+
+
+def forge_tps(tick_time: float) -> str:
+    tps = min(20.0, 1000 / tick_time)
+    lines = [
+        f"Dim minecraft:{dim} (minecraft:{dim}): Mean tick time: {tick_time:.3f} ms. Mean TPS: {tps:.3f}"
+        for dim in DIMENSIONS
+    ]
+    lines.append(f"Overall: Mean tick time: {tick_time:.3f} ms. Mean TPS: {tps:.3f}")
+    return "\n".join(lines)
+
+
+def neoforge_tps(tick_time: float) -> str:
+    tps = min(20.0, 1000 / tick_time)
+    return "\n".join(f"minecraft:{dim}: {tps:.2f} TPS ({tick_time:.2f} ms/tick)" for dim in DIMENSIONS)
+
+
+class FakeRCONServer:
+    """
+    Parameters:
+    -----------
+    password : str
+        The RCON password clients must log in with.
+    loader : str
+        "forge", "fabric" or "neoforge"; only that loader's `tps` command is known.
+    players : list of str
+        Players reported by `list`.
+    max_players : int
+        Player cap reported by `list`.
+    tick_time : float
+        Mean tick time in ms reported by the TPS command.
+    latency : float
+        Seconds to wait before answering each command.
+    auth_failure_rate : float
+        Probability that a correct login is rejected anyway.
+    drop_rate : float
+        Probability that a command's connection is closed instead of answered.
+    responses : dict, optional
+        Extra command -> response overrides (commands without the leading slash).
+    seed : int, optional
+        Seed for the fault injection.
+    """
+
+    def __init__(self, password: str = "test", loader: str = "forge", players: list = None,
+                 max_players: int = 20, tick_time: float = 25.0, latency: float = 0.0,
+                 auth_failure_rate: float = 0.0, drop_rate: float = 0.0, responses: dict = None,
+                 seed: int = None):
+        self.password = password
+        self.loader = loader
+        self.players = players or []
+        self.max_players = max_players
+        self.tick_time = tick_time
+        self.latency = latency
+        self.auth_failure_rate = auth_failure_rate
+        self.drop_rate = drop_rate
+        self.responses = responses or {}
+        self.random = random.Random(seed)
+
+        self.server: asyncio.AbstractServer | None = None
+        self.handlers: set[asyncio.Task] = set()
+        self.writers: set[asyncio.StreamWriter] = set()
+        self.connections = 0
+        self.logins = 0
+        self.failed_logins = 0
+        self.commands: dict[str, int] = {}
+        self.dropped = 0
+
+    def respond(self, command: str) -> str:
+        command = command.strip().lstrip("/")
+        if command in self.responses:
+            return self.responses[command]
+
+        if command == "list":
+            names = ", ".join(self.players)
+            return f"There are {len(self.players)} of a max of {self.max_players} players online:{' ' + names if names else ''}"
+
+        if command == f"{self.loader} tps":
+            return neoforge_tps(self.tick_time) if self.loader == "neoforge" else forge_tps(self.tick_time)
+
+        if command == "stop":
+            return "Stopping the server"
+
+        if command.startswith("say "):
+            return ""
+
+        return UNKNOWN_COMMAND
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.handlers.add(asyncio.current_task())
+        self.writers.add(writer)
+        authenticated = False
+        try:
+            while True:
+                request_id, packet_type, body = await read_packet(reader)
+
+                if packet_type == SERVERDATA_AUTH:
+                    authenticated = body == self.password and self.random.random() >= self.auth_failure_rate
+                    if authenticated:
+                        self.logins += 1
+                    else:
+                        self.failed_logins += 1
+                    writer.write(encode_packet(request_id if authenticated else -1, SERVERDATA_AUTH_RESPONSE, ""))
+
+                elif not authenticated:
+                    break
+
+                elif packet_type == SERVERDATA_EXECCOMMAND:
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    if self.random.random() < self.drop_rate:
+                        self.dropped += 1
+                        break
+
+                    self.commands[body] = self.commands.get(body, 0) + 1
+                    writer.write(encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, self.respond(body)))
+
+                else:
+                    # Same answer a Minecraft server gives to unknown packet types. Clients
+                    # send one after each command to find the end of a multi-packet response.
+                    writer.write(encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, f"Unknown request {packet_type:x}"))
+
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            self.writers.discard(writer)
+            self.handlers.discard(asyncio.current_task())
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Starts listening and returns the bound port."""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.writers):
+                writer.transport.abort()
+            await asyncio.gather(*self.handlers, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
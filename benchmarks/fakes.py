@@ -0,0 +1,107 @@
+"""
+Minimal stand-ins for the discord.py objects the cogs touch, so handlers and
+commands can run offline.
+"""
+import asyncio
+import itertools
+import logging
+
+from member_index import MemberIndex
+from paginator import Paginator
+from outbound import Outbound
+
+
+class FakeMember:
+    def __init__(self, member_id: int, name: str, display_name: str = None):
+        self.id = member_id
+        self.name = name
+        self.display_name = display_name or name
+        self.discriminator = "0"
+        self.bot = False
+        self.mention = f"<@{member_id}>"
+        self.avatar = None
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, members: list):
+        self.id = guild_id
+        self.name = "Benchmark Guild"
+        self.icon = None
+        self.members = members
+        self.member_count = len(members)
+        self.chunked = True
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int = 0):
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, content=None, **kwargs):
+        self.id = message_id
+        self.content = content
+        self.kwargs = kwargs
+
+    async def edit(self, **kwargs):
+        self.kwargs.update(kwargs)
+
+
+class FakeContext:
+    """
+    Just enough of commands.Context to run a command callback directly. Each
+    context gets its own channel, so replies do not share a rate limit route.
+    """
+
+    channel_ids = itertools.count(1)
+
+    def __init__(self, author: FakeMember, guild: FakeGuild = None):
+        self.author = author
+        self.guild = guild
+        self.channel = FakeChannel(next(self.channel_ids))
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+        return FakeMessage(id(self) + len(self.sent), content, **kwargs)
+
+
+class FakeBot:
+    """Must be created inside a running event loop, like the Paginator it holds."""
+
+    def __init__(self, guild: FakeGuild = None, rcon=None):
+        self.log = logging.getLogger("benchmarks")
+        self.loop = asyncio.get_event_loop()
+        self.rcon = rcon
+        self.guild = guild
+        self.member_index = MemberIndex()
+        if guild is not None:
+            self.member_index.build(guild.members)
+        self.outbound = Outbound()
+        self.paginator = Paginator(outbound=self.outbound)
+        self.closed = asyncio.Event()
+
+    def get_guild(self, guild_id):
+        return self.guild if self.guild and self.guild.id == guild_id else None
+
+    def get_channel(self, channel_id):
+        return FakeChannel(channel_id)
+
+    async def wait_until_ready(self):
+        # Background loops (e.g. the idle monitor) stay parked during benchmarks.
+        await self.closed.wait()
+
+    def is_closed(self) -> bool:
+        return self.closed.is_set()
+
+    async def mark_cog_ready(self, cog_name):
+        pass
@@ -0,0 +1,134 @@
+"""
+Load driver for MinecraftCog: fires concurrent `@@mcs` subcommands at an
+in-process RCON stand-in and reports latency percentiles.
+
+Usage:
+    python -m benchmarks.rcon_load [--requests 1000] [--concurrency 50] [--subcommands status,players,info]
+                                   [--loader fabric] [--latency 0.02] [--drop-rate 0.01] [--cache-ttl 5]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import benchmarks  # noqa: F401  (isolates the database before the cog imports it)
+from cogs.minecraft import MinecraftCog
+from rcon_pool import RCONPool
+
+from benchmarks.fake_rcon import FakeRCONServer
+from benchmarks.fakes import FakeBot, FakeContext, FakeMember
+
+OFFLINE_REPLY = "Server is offline"
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def run(args) -> dict:
+    server = FakeRCONServer(
+        password="load-test",
+        loader=args.loader,
+        players=[f"Player{i}" for i in range(args.players)],
+        latency=args.latency,
+        auth_failure_rate=args.auth_failure_rate,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+    port = await server.start()
+
+    pool = RCONPool(f"127.0.0.1:{port}", "load-test", max_connections=args.connections, timeout=args.timeout)
+    bot = FakeBot(rcon=pool)
+    cog = MinecraftCog(bot)
+    cog.state_cache.ttl = args.cache_ttl
+
+    author = FakeMember(1, "load-driver")
+    subcommands = args.subcommands
+    semaphore = asyncio.Semaphore(args.concurrency)
+    timings: dict[str, list[float]] = {name: [] for name in subcommands}
+    errors: dict[str, int] = {name: 0 for name in subcommands}
+
+    async def invoke(i: int):
+        subcommand = subcommands[i % len(subcommands)]
+        ctx = FakeContext(author)
+        async with semaphore:
+            start = time.perf_counter()
+            await MinecraftCog.rcon.callback(cog, ctx, subcommand)
+            timings[subcommand].append(time.perf_counter() - start)
+
+        if any(content == OFFLINE_REPLY for content, _ in ctx.sent):
+            errors[subcommand] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(invoke(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    pool.close()
+    bot.closed.set()
+    await server.close()
+
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": elapsed,
+        "throughput_per_s": args.requests / elapsed,
+        "server": {
+            "connections": server.connections,
+            "logins": server.logins,
+            "failed_logins": server.failed_logins,
+            "dropped": server.dropped,
+            "commands": server.commands,
+        },
+        "cache": cog.state_cache.stats(),
+        "subcommands": {},
+    }
+    for name, values in timings.items():
+        values.sort()
+        report["subcommands"][name] = {
+            "count": len(values),
+            "errors": errors[name],
+            "mean_s": statistics.fmean(values),
+            "p50_s": percentile(values, 0.50),
+            "p90_s": percentile(values, 0.90),
+            "p99_s": percentile(values, 0.99),
+            "max_s": values[-1],
+        }
+    return report
+
+
+def print_report(report: dict):
+    print(f"{report['requests']} requests at concurrency {report['concurrency']} "
+          f"in {report['elapsed_s']:.2f}s ({report['throughput_per_s']:.0f}/s)")
+    print(f"RCON: {report['server']['connections']} connections, {report['server']['logins']} logins, "
+          f"{report['server']['dropped']} dropped, {sum(report['server']['commands'].values())} commands")
+    print(f"Cache: {report['cache']}")
+    print(f"{'subcommand':<10} {'count':>6} {'errors':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, stats in report["subcommands"].items():
+        print(f"{name:<10} {stats['count']:>6} {stats['errors']:>6} {stats['p50_s'] * 1000:>8.2f} "
+              f"{stats['p90_s'] * 1000:>8.2f} {stats['p99_s'] * 1000:>8.2f} {stats['max_s'] * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test MinecraftCog against a fake RCON server.")
+    parser.add_argument("--requests", default=1000, type=int)
+    parser.add_argument("--concurrency", default=50, type=int)
+    parser.add_argument("--subcommands", default="status,players,info", type=lambda value: value.split(","))
+    parser.add_argument("--loader", default="forge", choices=["forge", "fabric", "neoforge"])
+    parser.add_argument("--players", default=10, type=int)
+    parser.add_argument("--latency", default=0.0, type=float, help="Seconds the server waits per command.")
+    parser.add_argument("--auth-failure-rate", default=0.0, type=float)
+    parser.add_argument("--drop-rate", default=0.0, type=float)
+    parser.add_argument("--connections", default=2, type=int, help="RCON pool size.")
+    parser.add_argument("--timeout", default=5.0, type=float, help="Per-command RCON timeout.")
+    parser.add_argument("--cache-ttl", default=5.0, type=float, help="Server state cache TTL, 0 disables it.")
+    parser.add_argument("--seed", default=None, type=int)
+    parser.add_argument("--output", default=None, help="Also write the report as JSON.")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
@@ -0,0 +1,269 @@
+"""
+Offline benchmark suite for the user store, the RCON response parsers,
+the table renderer and the API handlers.
+
+Synthetic user databases are generated from a fixed seed, so two runs on the
+same machine measure the same work. Results are written as JSON; compare two
+runs with `python -m benchmarks.compare old.json new.json`.
+
+Usage:
+    python -m benchmarks.run [--sizes 1000,10000,100000] [--backends tinydb,sqlite] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks import WORKDIR
+
+import db_utils
+from utils import format_table, table_pages
+from cogs.minecraft import parse_tps, parse_player_list
+from cogs.api import APICog
+from main import SERVER_ID
+from aiohttp.test_utils import TestClient, TestServer
+
+from benchmarks.fakes import FakeBot, FakeGuild, FakeMember
+
+SEED = 1406101545
+LINKED_RATIO = 0.3
+
+
+def generate_users(size: int, seed: int = SEED) -> list[dict]:
+    rng = random.Random(seed + size)
+    users = []
+    for i in rng.sample(range(size * 10), size):
+        user = {"username": f"user{i:07d}", "discord_id": 10**17 + i}
+        if rng.random() < LINKED_RATIO:
+            user["minecraft"] = {"username": f"mc_{i:07d}", "password": "$argon2id$bench", "linked": True}
+        users.append(user)
+    return users
+
+
+def summarize(group: str, name: str, timings: list[float], **labels) -> dict:
+    timings = sorted(timings)
+    return {
+        "group": group,
+        "name": name,
+        **labels,
+        "iterations": len(timings),
+        "min_s": timings[0],
+        "mean_s": statistics.fmean(timings),
+        "median_s": statistics.median(timings),
+        "p95_s": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def bench(func, iterations: int) -> list[float]:
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def bench_async(func, iterations: int) -> list[float]:
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await func(i)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_store(backend: str, size: int, users: list[dict], iterations: int) -> list[dict]:
+    suffix = "json" if backend == "tinydb" else "sqlite3"
+    path = os.path.join(WORKDIR, f"{backend}-{size}.{suffix}")
+
+    start = time.perf_counter()
+    store = db_utils.open_store(backend, path)
+    store.insert_many(users)
+    store.flush()
+    load_seconds = time.perf_counter() - start
+
+    db_utils.store = store
+    labels = {"backend": backend, "size": size}
+    rng = random.Random(SEED)
+    ids = [user["discord_id"] for user in users]
+    linked = [user["minecraft"]["username"] for user in users if "minecraft" in user]
+
+    results = [summarize("store", "bulk_insert", [load_seconds], **labels)]
+    results.append(summarize("store", "user_exists_hit", bench(
+        lambda i: db_utils.user_exists(ids[(i * 7919) % size]), iterations), **labels))
+    results.append(summarize("store", "user_exists_miss", bench(
+        lambda i: db_utils.user_exists(i), iterations), **labels))
+    results.append(summarize("store", "get_user_by_minecraft", bench(
+        lambda i: db_utils.get_user(db_utils.QUERY.minecraft.username == linked[(i * 7919) % len(linked)]),
+        iterations), **labels))
+    results.append(summarize("store", "get_users_by_minecraft_100", bench(
+        lambda i: db_utils.get_users_by_minecraft(rng.sample(linked, 100)), iterations), **labels))
+    results.append(summarize("store", "get_users_sorted", bench(
+        lambda i: db_utils.get_users(True), max(3, iterations // 100)), **labels))
+    results.append(summarize("store", "get_users_page", bench(
+        lambda i: db_utils.get_users_page((i * 7919) % size, 10), iterations), **labels))
+    results.append(summarize("store", "get_users_page_minecraft", bench(
+        lambda i: db_utils.get_users_page((i * 7919) % len(linked), 10, minecraft_only=True), iterations), **labels))
+    results.append(summarize("store", "count_users_minecraft", bench(
+        lambda i: db_utils.count_users(minecraft_only=True), iterations), **labels))
+    results.append(summarize("store", "get_discord_ids", bench(
+        lambda i: db_utils.get_discord_ids(), max(3, iterations // 100)), **labels))
+    results.append(summarize("store", "insert_user", bench(
+        lambda i: db_utils.insert_user(f"new{i}", 1 + i), max(3, iterations // 100)), **labels))
+    results.append(summarize("store", "update_user", bench(
+        lambda i: db_utils.update_user(ids[i], {"note": i}), max(3, iterations // 100)), **labels))
+    results.append(summarize("store", "flush", bench(lambda i: db_utils.flush(), 1), **labels))
+
+    return results
+
+
+FORGE_TPS = "\n".join(
+    [f"Dim minecraft:{dim} (minecraft:{dim}): Mean tick time: 12.345 ms. Mean TPS: 20.000"
+     for dim in ("overworld", "the_nether", "the_end")]
+    + ["Overall: Mean tick time: 15.000 ms. Mean TPS: 20.000"]
+)
+NEOFORGE_TPS = "\n".join(
+    f"minecraft:{dim}: 19.87 TPS (50.32 ms/tick)" for dim in ("overworld", "the_nether", "the_end")
+)
+
+
+def player_list(count: int) -> str:
+    names = ", ".join(f"Player{i}" for i in range(count))
+    return f"There are {count} of a max of 100 players online:{' ' + names if names else ''}"
+
+
+def bench_parsers(iterations: int) -> list[dict]:
+    results = [
+        summarize("parser", "parse_tps_forge", bench(lambda i: parse_tps(FORGE_TPS), iterations)),
+        summarize("parser", "parse_tps_neoforge", bench(lambda i: parse_tps(NEOFORGE_TPS), iterations)),
+    ]
+    for count in (0, 20, 100):
+        resp = player_list(count)
+        results.append(summarize("parser", f"parse_player_list_{count}", bench(
+            lambda i: parse_player_list(resp), iterations)))
+
+    for rows in (10, 100, 1000):
+        table_rows = [[i, f"user{i:07d}", f"mc_{i:07d}"] for i in range(rows)]
+        results.append(summarize("format", f"format_table_{rows}", bench(
+            lambda i: format_table(["#", "Username", "MC Username"], table_rows, spacing=3),
+            max(3, iterations // rows))))
+        results.append(summarize("format", f"table_pages_{rows}", bench(
+            lambda i: list(table_pages(["#", "Username", "MC Username"], table_rows, spacing=3)),
+            max(3, iterations // rows))))
+    return results
+
+
+async def expect(response, status: int):
+    body = await response.read()
+    if response.status != status:
+        raise RuntimeError(f"{response.method} {response.url.path} returned {response.status}, expected {status}: {body!r}")
+
+
+async def bench_handlers(backend: str, size: int, users: list[dict], iterations: int) -> list[dict]:
+    members = [FakeMember(user["discord_id"], user["username"]) for user in users[:1000]]
+    bot = FakeBot(FakeGuild(SERVER_ID, members))
+    cog = APICog(bot)
+    labels = {"backend": backend, "size": size}
+    linked = [user["minecraft"]["username"] for user in users if "minecraft" in user]
+    unlinked = [user for user in users[:1000] if "minecraft" not in user]
+
+    results = []
+    async with TestClient(TestServer(cog.server.app)) as client:
+        async def get_user(i):
+            response = await client.get("/minecraft/user", params={"minecraft_username": linked[i % len(linked)]})
+            await expect(response, 200)
+
+        async def get_users(i):
+            names = linked[i % len(linked):][:50] + [f"missing{i}_{n}" for n in range(50)]
+            response = await client.post("/minecraft/users", json={"minecraft_usernames": names})
+            await expect(response, 200)
+
+        async def register_and_verify(i):
+            user = unlinked[i % len(unlinked)]
+            response = await client.post("/minecraft/register", params={
+                "minecraft_username": f"bench_{i}",
+                "discord_identifier": str(user["discord_id"]),
+                "password": "hunter2",
+                "otp": "123456",
+            })
+            await expect(response, 202)
+            response = await client.post("/minecraft/verify", params={
+                "discord_identifier": str(user["discord_id"]),
+                "otp_confirmed": "1",
+            })
+            await expect(response, 201)
+
+        async def login(i):
+            response = await client.post("/minecraft/login", params={
+                "minecraft_username": f"bench_{i % register_iterations}",
+                "password": "hunter2",
+            })
+            await expect(response, 200)
+
+        register_iterations = max(3, iterations // 100)
+        results.append(summarize("handler", "get_user", await bench_async(get_user, iterations), **labels))
+        results.append(summarize("handler", "get_users_100", await bench_async(get_users, iterations // 10), **labels))
+        results.append(summarize("handler", "register_and_verify", await bench_async(
+            register_and_verify, register_iterations), **labels))
+        results.append(summarize("handler", "login", await bench_async(login, register_iterations), **labels))
+
+    cog.server.pending_registrations.stop()
+    cog.server.passwords.shutdown()
+    bot.closed.set()
+    return results
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args):
+    results = bench_parsers(args.iterations)
+
+    for size in args.sizes:
+        users = generate_users(size)
+        for backend in args.backends:
+            print(f"Benchmarking {backend} with {size} users...", file=sys.stderr)
+            results += bench_store(backend, size, users, args.iterations)
+            results += await bench_handlers(backend, size, users, args.iterations)
+            db_utils.store.close()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": SEED,
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+    for result in results:
+        labels = " ".join(str(result[key]) for key in ("backend", "size") if key in result)
+        print(f"{result['group']:<8} {result['name']:<28} {labels:<14} median {result['median_s'] * 1e6:>12.1f} us")
+    print(f"Saved results to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        type=lambda value: [int(size) for size in value.split(",")])
+    parser.add_argument("--backends", default="tinydb,sqlite", type=lambda value: value.split(","))
+    parser.add_argument("--iterations", default=1000, type=int)
+    parser.add_argument("--output", default="benchmark_results.json")
+
+    asyncio.run(main(parser.parse_args()))
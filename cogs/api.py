@@ -1,241 +1,158 @@
 from discord.ext.commands import Cog
-from aiohttp import web
+from pathlib import Path
 import asyncio
+import os
+import sys
 
-from utils import get_user_from_target, create_embed, get_guild, hash_password, verify_password
-from db_utils import get_user, link_minecraft, QUERY
-from main import SERVER_ID, PEPPER
-import time
+from utils import get_user_from_target, create_embed, get_guild
+from db_utils import DB_BACKEND
+from main import (SERVER_ID, PEPPER, PASSWORD_WORKERS, PASSWORD_QUEUE_SIZE, PASSWORD_EXECUTOR,
+                  REGISTRATION_TTL, MAX_PENDING_REGISTRATIONS, API_HOST, API_PORT, API_WORKERS, API_RPC_SOCKET,
+                  API_METRICS_PORT)
+from api_server import APIServer
+from api_rpc import RPCServer
+from password_service import PasswordService
+from expiring_map import ExpiringMap
+from metrics import Metrics, start_metrics_server
+from outbound import OTP
+
+API_WORKER_SCRIPT = Path(__file__).parent.parent / "api_worker.py"
+API_WORKER_RESTART_DELAY = 5
+
+
+class BotMembers:
+    """What the API needs from the bot: looking up members and sending them OTP DMs."""
 
-class APICog(Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.log = bot.log
-        self.app = web.Application()
-        self.app.add_routes([
-            web.post('/minecraft/verify', self.minecraft_verify_registration),
-            web.post('/minecraft/register', self.minecraft_register),
-            web.post('/minecraft/login', self.minecraft_login),
-            web.get('/minecraft/user', self.minecraft_get_user)
-        ])
-        self.pending_registrations = {}
-        self.registration_cleanup_tasks = {}
-
-        self.runner = web.AppRunner(self.app)
 
-    async def start_server(self):
-        await self.runner.setup()
-        site = web.TCPSite(self.runner, 'localhost', 8000)
-        await site.start()
-        
-        self.log.info("   |-API server Running")
-
-    async def minecraft_register(self, request):
-        params = request.query
-
-        minecraft_username = params.get("minecraft_username")
-        discord_identifier = params.get("discord_identifier")
-        password = params.get("password")
-        otp = params.get("otp")
-
-        if (not minecraft_username or
-            not discord_identifier or
-            not password or
-            not otp):
-            return web.json_response(
-                {"error": "Missing parameters."},
-                status=400
-            )
-        
-        if self.pending_registrations.get(discord_identifier):
-            return web.json_response(
-                {"error": f"There is already an ongoing registration for {discord_identifier}."},
-                status=403
-            )
-
-        user = await get_user_from_target(self.bot, discord_identifier)
-        guild = get_guild(self.bot, SERVER_ID)
-        
-
-        if user:
-            discord_entry = {} if get_user(QUERY.discord_id == int(user.id)) == None else get_user(QUERY.discord_id == int(user.id))
-            minecraft_entry = {} if get_user(QUERY.minecraft.username == minecraft_username) == None else get_user(QUERY.minecraft.username == minecraft_username)
-
-            if discord_entry.get("minecraft", {}).get("linked", False):
-                return web.json_response(
-                    {"error": f"There is already a minecraft account linked to {discord_identifier}."},
-                    status=403
-                )
-            
-            if minecraft_entry.get("minecraft", {}).get("linked", False):
-                return web.json_response(
-                    {"error": f"There is already a discord account linked to {minecraft_username}."},
-                    status=403
-            )
-        
-            embed = create_embed(
-                title = "**🔑 Minecraft OTP 🔑**",
-                description = "Use the OTP below to verify your account in Let's Play's Minecraft Server.",
-                fields = [("OTP", otp, True)],
-                footer = "This OTP will stop working after 3 minutes.",
-                author_name=guild.name if guild else None,
-                author_icon_url=guild.icon.url if guild and guild.icon else None
-            )
-
-            await user.send(embed=embed, delete_after=180)
-
-            self.pending_registrations[discord_identifier] = {
-                    "minecraft_username": minecraft_username,
-                    "password": password,
-                    "otp": otp,
-                    "timestamp": time.time()
-                }
-            
-            task = self.registration_cleanup_tasks.get(discord_identifier)
-            if task:
-                task.cancel()
+    async def lookup(self, identifier: str) -> int | None:
+        user = await get_user_from_target(self.bot, identifier)
+        return user.id if user else None
 
-            async def cleanup_registration():
-                try:
-                    await asyncio.sleep(60)
-                    if discord_identifier in self.pending_registrations:
-                        del self.pending_registrations[discord_identifier]
-                        self.log.info(f"[Auto-Cleanup] Removed expired registration for {discord_identifier}")
-                except asyncio.CancelledError:
-                    pass
+    async def send_otp(self, discord_id: int, otp: str):
+        user = await get_user_from_target(self.bot, str(discord_id))
+        if user is None:
+            raise LookupError(f"{discord_id} is no longer a member of the server")
 
-            cleanup_task = asyncio.create_task(cleanup_registration())
-            self.registration_cleanup_tasks[discord_identifier] = cleanup_task
-
-
-            return web.json_response(
-                {
-                    "message": "Registration request accepted. Waiting for Minecraft client confirmation."
-                },
-                status=202
-            )
-        else:
-            return web.json_response(
-                {
-                    "error": "Discord account provided is not a member of the 'Let's Play' discord server. You must first join the discord server to create an account."
-                },
-                status=403
-            )
-
-    async def minecraft_verify_registration(self, request):
-        params = request.query
-        discord_identifier = params.get("discord_identifier")
-        otp_confirmed = bool(params.get("otp_confirmed"))
-
-        if not discord_identifier or not isinstance(otp_confirmed, bool) :
-            return web.json_response(
-                {"error": "Missing or invalid parameters."},
-                status=400
-            )
-
-        registration = self.pending_registrations.get(discord_identifier)
-        if not registration:
-            return web.json_response(
-                {"error": "No pending registration for this Discord user."},
-                status=404
-            )
-
-        if otp_confirmed:
-            mc_username = registration.get("minecraft_username")
-            password = registration.get("password")
-
-            user = await get_user_from_target(self.bot, discord_identifier)
-
-            link_minecraft(user.id, 
-                           mc_username, 
-                           hash_password(password, PEPPER))
-            
-            self.log.info(f"Succesfully linked {mc_username} to {discord_identifier}")
-
-            del self.pending_registrations[discord_identifier]
-
-            return web.json_response(
-                {"message": "Registration completed successfully."},
-                status=201
-            )
-        else:
-            del self.pending_registrations[discord_identifier]
-            return web.json_response(
-                {"error": "OTP was not confirmed. Registration cancelled."},
-                status=403
-            )
-
-    async def minecraft_login(self, request):
-        params = request.query
-
-        minecraft_username = params.get("minecraft_username")
-        password = params.get("password")
-
-        if (not minecraft_username or not password):
-            return web.json_response(
-                {"error": "Missing parameters."},
-                status=400
-            )
-        
-        minecraft_entry = get_user(QUERY.minecraft.username==minecraft_username)
-
-        if minecraft_entry:
-            password_hash = minecraft_entry.get("minecraft", {}).get("password", None)
-
-            if verify_password(password, password_hash, PEPPER):
-                return web.json_response(
-                    {"message": "Login Successful"},
-                    status=200
-                )
-
-            return web.json_response(
-                {"error": "Invalid credentials."},
-                status=403
-            )
-
-        return web.json_response(
-            {"error": "Non existent account"},
-            status=404
+        guild = get_guild(self.bot, SERVER_ID)
+        embed = create_embed(
+            title = "**🔑 Minecraft OTP 🔑**",
+            description = "Use the OTP below to verify your account in Let's Play's Minecraft Server.",
+            fields = [("OTP", otp, True)],
+            footer = "This OTP will stop working after 3 minutes.",
+            author_name=guild.name if guild else None,
+            author_icon_url=guild.icon.url if guild and guild.icon else None
         )
+        await self.bot.outbound.send(user, embed=embed, delete_after=180, priority=OTP)
+
 
-    async def minecraft_get_user(self, request):
-        params = request.query
-
-        minecraft_username = params.get("minecraft_username")
-
-        if (not minecraft_username):
-            return web.json_response(
-                {"error": "Missing parameters."},
-                status=400
-            )
-        
-        minecraft_entry = get_user(QUERY.minecraft.username==minecraft_username)
-
-        
-
-        if minecraft_entry:
-            return web.json_response(
-                {"message": "Account exists."},
-                status=200
-            )
-        
-        for registration_data in self.pending_registrations.values():
-            if registration_data["minecraft_username"] == minecraft_username:
-                return web.json_response(
-                {"message": "Account Registration Pending."},
-                status=201
-            )
-
-        return web.json_response(
-            {"error": "Account does not exist."},
-            status=404
+class APICog(Cog):
+    """
+    Runs the HTTP API. By default it is served on the bot's event loop. With
+    API_WORKERS set, it runs in that many api_worker.py processes sharing
+    API_PORT, and the bot only answers their member lookups and OTP DMs over
+    the API_RPC_SOCKET Unix socket. Each process then has its own metrics
+    port: the bot's (outbound queue and RPC) is API_METRICS_PORT and worker
+    i's is API_METRICS_PORT + 1 + i.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.log = bot.log
+        self.members = BotMembers(bot)
+        self.started = False
+        self.server = None
+        self.rpc = None
+        self.workers: list[asyncio.subprocess.Process] = []
+        self.supervisors: list[asyncio.Task] = []
+        self.metrics_runner = None
+        self.metrics = Metrics()
+        self.metrics.register_gauge("outbound_queued", "Discord messages waiting to be sent.",
+                                    lambda: len(self.bot.outbound))
+        self.metrics.register_gauge("outbound_otp_max_delay_seconds", "Longest time an OTP DM waited to be sent.",
+                                    lambda: self.bot.outbound.classes["otp"]["max_delay"])
+
+        if API_WORKERS:
+            if DB_BACKEND != "sqlite":
+                raise ValueError("API_WORKERS needs DB_BACKEND=sqlite, so the workers share users and pending registrations")
+            self.rpc = RPCServer(API_RPC_SOCKET, {
+                "lookup_member": self.members.lookup,
+                "send_otp": self.members.send_otp,
+            })
+            self.metrics.register_gauge("api_workers", "API worker processes running.", lambda: len(self.workers))
+            self.metrics.register_gauge("rpc_calls", "Calls answered for API workers.", lambda: self.rpc.calls)
+            self.metrics.register_gauge("rpc_errors", "Calls from API workers that failed.", lambda: self.rpc.errors)
+            return
+
+        metrics = self.metrics
+        pending_registrations = ExpiringMap(
+            ttl=REGISTRATION_TTL,
+            capacity=MAX_PENDING_REGISTRATIONS,
+            index_key=lambda registration: registration["minecraft_username"],
+            on_expire=self.on_registration_expired
+        )
+        passwords = PasswordService(
+            PEPPER,
+            workers=PASSWORD_WORKERS,
+            max_queue=PASSWORD_QUEUE_SIZE,
+            use_processes=PASSWORD_EXECUTOR == "process"
         )
-        
+        metrics.register_gauge("password_in_flight", "Password operations submitted and not finished.",
+                               lambda: passwords.in_flight)
+        metrics.register_gauge("pending_registrations", "Registrations waiting for OTP confirmation.",
+                               lambda: len(pending_registrations))
 
-        
+        self.server = APIServer(self.members, pending_registrations, passwords, metrics, self.log)
+
+    async def start_server(self):
+        if self.started:
+            return
+        self.started = True
+
+        if self.rpc is None:
+            await self.server.start(API_HOST, API_PORT)
+            self.log.info("   |-API server Running")
+            return
+
+        await self.rpc.start()
+        if API_METRICS_PORT:
+            self.metrics_runner = await start_metrics_server(self.metrics, API_HOST, API_METRICS_PORT)
+        self.supervisors = [asyncio.create_task(self.supervise_worker(i)) for i in range(API_WORKERS)]
+        self.log.info(f"   |-API server Running in {API_WORKERS} worker process(es)")
+
+    async def supervise_worker(self, index: int):
+        """Runs one API worker process and restarts it if it exits while the cog is loaded."""
+        while True:
+            worker = await asyncio.create_subprocess_exec(sys.executable, str(API_WORKER_SCRIPT),
+                                                          env={**os.environ, "API_WORKER_INDEX": str(index)})
+            self.workers.append(worker)
+            code = await worker.wait()
+            self.workers.remove(worker)
+
+            self.log.warning(f"API worker {index} exited with code {code}, restarting in {API_WORKER_RESTART_DELAY}s")
+            await asyncio.sleep(API_WORKER_RESTART_DELAY)
+
+    def on_registration_expired(self, discord_identifier, registration):
+        self.log.info(f"[Auto-Cleanup] Removed expired registration for {discord_identifier}")
 
     def cog_unload(self):
-        asyncio.create_task(self.runner.cleanup())
+        if self.server is not None:
+            asyncio.create_task(self.server.close())
+            self.server.pending_registrations.stop()
+            self.server.passwords.shutdown()
+
+        if self.rpc is not None:
+            for task in self.supervisors:
+                task.cancel()
+            for worker in self.workers:
+                try:
+                    worker.terminate()
+                except ProcessLookupError:
+                    pass
+            asyncio.create_task(self.rpc.close())
+            if self.metrics_runner is not None:
+                asyncio.create_task(self.metrics_runner.cleanup())
 
     @Cog.listener()
     async def on_ready(self):
@@ -247,4 +164,5 @@ class APICog(Cog):
         await self.bot.mark_cog_ready(cog_name)
 
 async def setup(bot):
-    await bot.add_cog(APICog(bot))
\ No newline at end of file
+    bot.mark_cog_imported(__name__.split(".")[-1])
+    await bot.add_cog(APICog(bot))
@@ -2,10 +2,8 @@ from discord.ext.commands import Cog, check
 from discord.ext.commands import command, Context
 from discord import Embed, Member
 
-from asyncio import TimeoutError
-
-from db_utils import get_users, insert_user, get_user, QUERY
-from utils import create_embed, format_table, get_user_from_target
+from db_utils import count_users, get_users_page, insert_user
+from utils import create_embed, table_pages, get_user_from_target, MAX_CELL_WIDTH
 from main import OWNER_IDS, ADMINS
 
 class DatabaseCog(Cog, name="Database"):
@@ -34,15 +32,15 @@ class DatabaseCog(Cog, name="Database"):
             user = await get_user_from_target(self.bot, target)
 
         if target == None:
-            await ctx.send("❌ Invalid command usage. Please use a mention, username, or ID.", delete_after=120)
+            await self.bot.outbound.send(ctx, "❌ Invalid command usage. Please use a mention, username, or ID.", delete_after=120)
             return
 
         if user is None:
-            await ctx.send("❌ Couldn't find user by that input. Please use a mention, username, or ID.", delete_after=120)
+            await self.bot.outbound.send(ctx, "❌ Couldn't find user by that input. Please use a mention, username, or ID.", delete_after=120)
             return
 
         insert_user(user.name, user.id)
-        await ctx.send(f"✅ Added **{user.name}** to the database~!", delete_after=120)
+        await self.bot.outbound.send(ctx, f"✅ Added **{user.name}** to the database~!", delete_after=120)
 
     @command(
         name="list",
@@ -52,28 +50,33 @@ class DatabaseCog(Cog, name="Database"):
     )
     async def list_users_command(self, ctx, type:str = None):
 
-        all_users = get_user(QUERY.minecraft.exists()) if type in ["mc", "minecraft"] else get_users(True)
+        minecraft_only = type in ["mc", "minecraft"]
+        total_users = count_users(minecraft_only)
 
-        if not all_users:
-            await ctx.send("No users found.", delete_after=120)
+        if not total_users:
+            await self.bot.outbound.send(ctx, "No users found.", delete_after=120)
             return
         
         users_per_page = 10
-        pages = [all_users[i:i + users_per_page] for i in range(0, len(all_users), users_per_page)]
-        total_pages = len(pages)
-        current_page = 0
+        total_pages = (total_users + users_per_page - 1) // users_per_page
+
+        columns = ["#", "Username", "MC Username"]
+        # Fixed widths (Discord names are at most 32 characters, Minecraft names 16), so
+        # pages are rendered without looking at other pages and the table does not shift
+        widths = [len(str(total_users)), MAX_CELL_WIDTH, 16]
 
         def get_page_embed(index: int):
-            page_users = pages[index]
-            table = format_table(
-                ["#", "Username", "MC Username"],
+            page_users = get_users_page(index * users_per_page, users_per_page, minecraft_only)
+            table = next(table_pages(
+                columns,
                 [[
                     i + 1 + (index * users_per_page),
                     user['username'],
                     user.get('minecraft', {}).get("username", "N/A")
                 ] for i, user in enumerate(page_users)],
-                spacing=3
-            )
+                spacing=3,
+                widths=widths
+            ))
             embed = create_embed(
                 title=f"📋 User List (Page {index + 1}/{total_pages})",
                 description=table,
@@ -81,39 +84,7 @@ class DatabaseCog(Cog, name="Database"):
             )
             return embed
 
-        message = await ctx.send(embed=get_page_embed(current_page), delete_after=120)
-
-        if total_pages == 1:
-            return 
-
-        await message.add_reaction("⬅️")
-        await message.add_reaction("➡️")
-
-        def check(reaction, user):
-            return (
-                user == ctx.author and
-                reaction.message.id == message.id and
-                str(reaction.emoji) in ["⬅️", "➡️"]
-            )
-
-        while True:
-            try:
-                reaction, user = await self.bot.wait_for("reaction_add", timeout=60.0, check=check)
-                await message.remove_reaction(reaction, user)
-
-                if str(reaction.emoji) == "➡️":
-                    current_page = (current_page + 1) % total_pages
-                elif str(reaction.emoji) == "⬅️":
-                    current_page = (current_page - 1) % total_pages
-
-                await message.edit(embed=get_page_embed(current_page))
-
-            except TimeoutError:
-                try:
-                    await message.clear_reactions()
-                except Exception:
-                    pass
-                break
+        await self.bot.paginator.send(ctx, get_page_embed, total_pages, delete_after=120)
     
     @Cog.listener()
     async def on_ready(self):
@@ -122,4 +93,5 @@ class DatabaseCog(Cog, name="Database"):
         await self.bot.mark_cog_ready(cog_name)
 
 async def setup(bot):
+    bot.mark_cog_imported(__name__.split(".")[-1])
     await bot.add_cog(DatabaseCog(bot))
\ No newline at end of file
@@ -1,6 +1,5 @@
 from discord.ext.commands import Cog
 from discord.ext.commands import MissingRequiredArgument, CheckFailure
-from discord import Forbidden, HTTPException
 from utils import create_embed
 
 class ErrorHandlerCog(Cog):
@@ -11,12 +10,7 @@ class ErrorHandlerCog(Cog):
 
     @Cog.listener()
     async def on_command(self, ctx):
-        try:
-            await ctx.message.delete()
-        except Forbidden:
-            print("❌ Bot can't delete messages (no permissions)")
-        except HTTPException:
-            print("⚠️ Failed to delete the command message")
+        self.bot.deleter.schedule(ctx.message)
 
     @Cog.listener()
     async def on_command_error(self, ctx, error):
@@ -36,16 +30,16 @@ class ErrorHandlerCog(Cog):
             embed.description = "Missing Argument!"
             embed.add_field(name="Argument", value=str(error.param.name), inline=False)
             embed.add_field(name="Usage", value=f"`{ctx.prefix}{ctx.command} <{error.param.name}>`", inline=False)
-            await ctx.send(embed=embed, delete_after=120)
+            await self.bot.outbound.send(ctx, embed=embed, delete_after=120)
 
         if isinstance(error, CheckFailure):
             embed.description = "You can not use this command!"
-            await ctx.send(embed=embed, delete_after=120)
+            await self.bot.outbound.send(ctx, embed=embed, delete_after=120)
 
         else:
             embed.description = error.__class__.__name__
             embed.add_field(name="Error Message", value=f"❌ Error: {str(error)}", inline=False)
-            await ctx.send(embed = embed, delete_after=120)
+            await self.bot.outbound.send(ctx, embed=embed, delete_after=120)
 
     @Cog.listener()
     async def on_ready(self):
@@ -54,4 +48,5 @@ class ErrorHandlerCog(Cog):
         await self.bot.mark_cog_ready(cog_name)
 
 async def setup(bot):
+    bot.mark_cog_imported(__name__.split(".")[-1])
     await bot.add_cog(ErrorHandlerCog(bot))
\ No newline at end of file
@@ -37,7 +37,7 @@ class GeneralCog(Cog):
             author_icon_url=ctx.guild.icon.url if ctx.guild and ctx.guild.icon else None
         )
 
-        await ctx.send(embed=embed, delete_after=120)
+        await self.bot.outbound.send(ctx, embed=embed, delete_after=120)
 
 
     @Cog.listener()
@@ -47,4 +47,5 @@ class GeneralCog(Cog):
         await self.bot.mark_cog_ready(cog_name)
 
 async def setup(bot):
+    bot.mark_cog_imported(__name__.split(".")[-1])
     await bot.add_cog(GeneralCog(bot))
\ No newline at end of file
@@ -3,23 +3,115 @@ from discord.ext.commands import command, check, cooldown, BucketType
 
 from db_utils import get_user, QUERY
 
-from utils import create_embed, format_table
+from utils import create_embed, format_table, table_pages
+from ttl_cache import TTLCache
+from timeseries import ServerHistory
+from idle_monitor import IdleMonitor, WARN, SHUTDOWN
+from server_log import LogTailer
+from main import (MINECRAFT_CHANNEL, IDLE_SHUTDOWN_AFTER, IDLE_WARNING_LEAD, IDLE_POLL_INTERVAL,
+                  IDLE_FAST_POLL_INTERVAL, OFFLINE_POLL_MAX)
 import asyncio
-from asyncrcon import AsyncRCON, AuthenticationException
+from asyncrcon import AuthenticationException
 import os
 import re
 import platform
 import subprocess
+import time
 
 from datetime import datetime
 
+TPS_COMMANDS = ["/forge tps", "/fabric tps", "/neoforge tps"]
+# Remembered as the TPS command when the server knows none of TPS_COMMANDS
+NO_TPS_COMMAND = ""
+STATE_CACHE_TTL = float(os.getenv("MC_STATE_CACHE_TTL", "5"))
+HISTORY_SAMPLE_INTERVAL = float(os.getenv("MC_HISTORY_SAMPLE_INTERVAL", "60"))
+HISTORY_WINDOWS = os.getenv("MC_HISTORY_WINDOWS", "1h,6h,24h").split(",")
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+SERVER_LOG_PATH = os.getenv("SERVER_LOG_PATH") or (
+    os.path.join(os.path.dirname(os.getenv("SERVER_PATH")), "logs", "latest.log") if os.getenv("SERVER_PATH") else None
+)
+SERVER_LOG_POLL_INTERVAL = float(os.getenv("SERVER_LOG_POLL_INTERVAL", "1"))
+# How often the players known from the log are checked against /list, which also catches a crash
+SERVER_LOG_RCON_CHECK_INTERVAL = float(os.getenv("SERVER_LOG_RCON_CHECK_INTERVAL", "300"))
+
+NEOFORGE_TPS_PATTERN = re.compile(
+    r'^(?P<dimension>[\w:]+): (?P<tps>[\d.]+) TPS \((?P<tick_time>[\d.]+) ms/tick\)$',
+    re.MULTILINE
+)
+TPS_PATTERN = re.compile(
+    r"(?:(Dim minecraft:(?P<dimension>\w+))|(?P<overall>Overall))([^:]*:*\w*\): |(: ))Mean tick time: (?P<tick_time>[\d.]+) ms. Mean TPS: (?P<tps>[\d.]+)"
+)
+LIST_PATTERN = re.compile(
+    r"There are (?P<current>\d+) of a max of (?P<max>\d+) players online:(?P<names>.*)"
+)
+
+def is_unknown_command(resp):
+    return resp is not None and resp.lower().startswith("unknown")
+
+def parse_tps(resp: str) -> dict:
+    """Parses a Forge, Fabric or NeoForge TPS response into {dimension: {"tick_time", "tps"}}."""
+    concat_resp = {}
+
+    neoforge_matches = list(NEOFORGE_TPS_PATTERN.finditer(resp))
+
+    if neoforge_matches:
+        for match in neoforge_matches:
+            dim = match.group("dimension")
+            tps = float(match.group("tps"))
+            tick_time = float(match.group("tick_time"))
+            concat_resp[dim] = {"tick_time": tick_time, "tps": tps}
+    else:
+        for match in TPS_PATTERN.finditer(resp):
+            dim = match.group("dimension") or match.group("overall")
+            tick_time = float(match.group("tick_time"))
+            tps = float(match.group("tps"))
+            concat_resp[dim] = {"tick_time": tick_time, "tps": tps}
+
+    return concat_resp
+
+def parse_player_list(resp: str) -> dict | None:
+    """Parses a /list response into {"current", "max", "players"}, or None if it does not match."""
+    match = LIST_PATTERN.search(resp)
+    if not match:
+        return None
+
+    names = match.group("names")
+    return {
+        "current": int(match.group("current")),
+        "max": int(match.group("max")),
+        "players": [s.strip() for s in names.split(",")] if names.strip() else [],
+    }
+
+def parse_window(window: str) -> int | None:
+    """Parses a window such as "30m", "6h" or "7d" into seconds, or None if it is not one."""
+    window = window.strip().lower()
+    if len(window) < 2 or window[-1] not in WINDOW_UNITS or not window[:-1].isdigit():
+        return None
+    return int(window[:-1]) * WINDOW_UNITS[window[-1]]
+
 class MinecraftCog(Cog, name="MinecraftServer"):
     def __init__(self, bot):
         self.bot = bot
         self.log = bot.log
-        self.empty_counter = 0
-        self.shutdown_threshold = 5
+        self.idle_monitor = IdleMonitor(
+            shutdown_after=IDLE_SHUTDOWN_AFTER,
+            warning_lead=IDLE_WARNING_LEAD,
+            poll_interval=IDLE_POLL_INTERVAL,
+            fast_poll_interval=IDLE_FAST_POLL_INTERVAL,
+            offline_poll_max=OFFLINE_POLL_MAX,
+        )
+        self.tps_command = None
+        self.state_cache = TTLCache(STATE_CACHE_TTL)
+        self.reported_cache_stats = None
+        self.history = ServerHistory()
+        # Players online according to the server log, None while the log does not say the server is up
+        self.online_players = None
+        self.online_players_checked = None
+        self.log_tailer = LogTailer(SERVER_LOG_PATH, SERVER_LOG_POLL_INTERVAL) if SERVER_LOG_PATH else None
         self.bot.loop.create_task(self.monitor_empty_server())
+        self.bot.loop.create_task(self.sample_server_history())
+        if self.log_tailer:
+            self.bot.loop.create_task(self.follow_server_log())
         super().__init__()
 
     @command(
@@ -41,56 +133,65 @@ class MinecraftCog(Cog, name="MinecraftServer"):
             author_name=ctx.guild.name if ctx.guild else None,
             author_icon_url=ctx.guild.icon.url if ctx.guild and ctx.guild.icon else None
         )
-        await ctx.send(embed=embed, delete_after=120)
+        await self.bot.outbound.send(ctx, embed=embed, delete_after=120)
     
     async def run_rcon_async(self, command):
-        rcon = AsyncRCON('localhost:25575', 'eduard32')
         try:
-            await rcon.open_connection()
+            return await self.bot.rcon.command(command)
         except AuthenticationException:
             self.log.warning('Login failed: Unauthorized.')
             return
-            
-        res = await rcon.command(command)
-        rcon.close()
-        return res
     
-    async def get_server_status(self, ctx):
-        resp = await self.run_rcon_async("/forge tps")
+    async def run_tps_command(self):
+        """
+        Runs the mod loader's TPS command. The first working command is
+        remembered until the server restarts or the command stops being known,
+        so a status check is a single RCON round trip. A server that knows none
+        of them is probed once per session, after which this returns "" once
+        /list answers, so callers still find out when the server is down.
+        """
+        if self.tps_command == NO_TPS_COMMAND:
+            await self.query_players()
+            return ""
+
+        if self.tps_command:
+            resp = await self.run_rcon_async(self.tps_command)
+            if not is_unknown_command(resp):
+                return resp
+            self.log.info(f"{self.tps_command} is no longer known, probing TPS commands again")
+            self.tps_command = None
+
+        for candidate in TPS_COMMANDS:
+            resp = await self.run_rcon_async(candidate)
+            if not is_unknown_command(resp):
+                self.tps_command = candidate
+                self.log.info(f"Using {candidate} for TPS checks")
+                break
+        else:
+            self.tps_command = NO_TPS_COMMAND
+            self.log.info("Server knows none of the TPS commands, skipping TPS checks until it restarts")
 
-        if resp.lower().startswith("unknown"):
-            resp = await self.run_rcon_async("/fabric tps")
+        return resp
 
-            if resp.lower().startswith("unknown"):
-                resp = await self.run_rcon_async("/neoforge tps")
-        
-        concat_resp = {}
+    async def query_tps(self):
+        return await self.state_cache.get("tps", self.run_tps_command)
 
-        neoforge_pattern = re.compile(
-            r'^(?P<dimension>[\w:]+): (?P<tps>[\d.]+) TPS \((?P<tick_time>[\d.]+) ms/tick\)$',
-            re.MULTILINE
-        )
-        neoforge_matches = list(neoforge_pattern.finditer(resp))
-
-        if neoforge_matches:
-            for match in neoforge_matches:
-                dim = match.group("dimension")
-                tps = float(match.group("tps"))
-                tick_time = float(match.group("tick_time"))
-                concat_resp[dim] = {"tick_time": tick_time, "tps": tps}
-        else:
-            pattern = re.compile(
-                r"(?:(Dim minecraft:(?P<dimension>\w+))|(?P<overall>Overall))([^:]*:*\w*\): |(: ))Mean tick time: (?P<tick_time>[\d.]+) ms. Mean TPS: (?P<tps>[\d.]+)"
-            )
-            for match in pattern.finditer(resp):
-                dim = match.group("dimension") or match.group("overall")
-                tick_time = float(match.group("tick_time"))
-                tps = float(match.group("tps"))
-                concat_resp[dim] = {"tick_time": tick_time, "tps": tps}
+    async def query_players(self):
+        return await self.state_cache.get("/list", lambda: self.run_rcon_async("/list"))
 
+    def reset_server_state(self):
+        self.tps_command = None
+        self.state_cache.invalidate()
 
-        table = format_table(["Dimension", "Mean Tick Time", "Mean TPS"],
-                                [[dim, stat["tick_time"], stat["tps"]] for dim, stat in concat_resp.items()])
+    async def get_server_status(self, ctx):
+        resp = await self.query_tps()
+        concat_resp = parse_tps(resp)
+
+        if concat_resp:
+            table = format_table(["Dimension", "Mean Tick Time", "Mean TPS"],
+                                    [[dim, stat["tick_time"], stat["tps"]] for dim, stat in concat_resp.items()])
+        else:
+            table = "The server knows none of " + ", ".join(f"`{command}`" for command in TPS_COMMANDS) + ", so there is no TPS to show."
 
         embed = create_embed(
             title="⛏️ Minecraft Server Status » Online 🟢",
@@ -98,21 +199,11 @@ class MinecraftCog(Cog, name="MinecraftServer"):
             footer="Requested by " + ctx.author.name,
         )
 
-        await ctx.send(embed=embed, delete_after=120)
+        await self.bot.outbound.send(ctx, embed=embed, delete_after=120)
 
     async def get_server_players(self, ctx):
-        resp = await self.run_rcon_async("/list")
-
-        pattern = re.compile(
-            r"There are (?P<current>\d+) of a max of (?P<max>\d+) players online:(?P<names>.*)"
-        )
-        
-        concat_resp = {}
-        match = pattern.search(resp)
-        if match:
-            concat_resp["current"] = int(match.group("current"))
-            concat_resp["max"] = int(match.group("max"))
-            concat_resp["players"] = [s.strip() for s in match.group("names").split(",")] if len(match.group("names")) > 1 else match.group("names").strip()
+        resp = await self.query_players()
+        concat_resp = parse_player_list(resp)
 
         users = []
         for player in concat_resp["players"]:
@@ -123,15 +214,17 @@ class MinecraftCog(Cog, name="MinecraftServer"):
             else:
                 users.append([player, "Unregistered"])
 
-        table = format_table(["Minecraft Username", "Discord Username"], users)
-        
-        embed = create_embed(
-            title=f"⛏️ Minecraft Server Players » ({concat_resp['current']}/{concat_resp['max']})👤",
-            description=table,
-            footer="Requested by " + ctx.author.name,
-        )
+        pages = list(table_pages(["Minecraft Username", "Discord Username"], users))
+
+        def get_page_embed(index: int):
+            page = f" (Page {index + 1}/{len(pages)})" if len(pages) > 1 else ""
+            return create_embed(
+                title=f"⛏️ Minecraft Server Players » ({concat_resp['current']}/{concat_resp['max']})👤{page}",
+                description=pages[index],
+                footer="Requested by " + ctx.author.name,
+            )
 
-        await ctx.send(embed=embed, delete_after=120)
+        await self.bot.paginator.send(ctx, get_page_embed, len(pages), delete_after=120)
 
     async def get_server_info(self, ctx):
         from discord import Embed
@@ -143,7 +236,7 @@ class MinecraftCog(Cog, name="MinecraftServer"):
 
         is_online = True
         try:
-            await self.run_rcon_async("/list")
+            await self.query_players()
         except:
             is_online = False
 
@@ -161,16 +254,41 @@ class MinecraftCog(Cog, name="MinecraftServer"):
             footer="Requested by " + ctx.author.name
         )
 
-        await ctx.send(embed=embed, delete_after=120)
+        await self.bot.outbound.send(ctx, embed=embed, delete_after=120)
+
+    async def get_server_history(self, ctx, windows):
+        windows = windows or HISTORY_WINDOWS
+        seconds = [parse_window(window) for window in windows]
+        if None in seconds:
+            await self.bot.outbound.send(ctx, "Windows look like `30m`, `6h` or `7d`, e.g. `@@mcs history 1h 24h`", delete_after=120)
+            return
+
+        now = time.time()
+        rows = []
+        for window, window_seconds in zip(windows, seconds):
+            for name, minimum, mean, p95, samples in self.history.summary(now - window_seconds):
+                rows.append([window.strip().lower(), name, f"{minimum:.2f}", f"{mean:.2f}", f"{p95:.2f}"])
+
+        if not rows:
+            await self.bot.outbound.send(ctx, "No server history recorded yet.", delete_after=120)
+            return
+
+        embed = create_embed(
+            title="⛏️ Minecraft Server History 📈",
+            description=format_table(["Window", "Series", "Min", "Mean", "P95"], rows),
+            footer="Requested by " + ctx.author.name,
+        )
+
+        await self.bot.outbound.send(ctx, embed=embed, delete_after=120)
 
     @command(
         name="mcs",
-        help="Check Minecraft server status, players, or info.",
-        description="Usage: !mcs <status|players|info>. Shows server TPS, online players, or server info."
+        help="Check Minecraft server status, players, info, or history.",
+        description="Usage: !mcs <status|players|info|history [windows...]>. Shows server TPS, online players, server info, or TPS and player history."
     )
     async def rcon(self, ctx, *args):
         if not args:
-            await ctx.send("Please specify what you want to check: `status`, `players`, or `info`", delete_after=120)
+            await self.bot.outbound.send(ctx, "Please specify what you want to check: `status`, `players`, `info`, or `history`", delete_after=120)
             return
 
         subcommand = args[0].lower()
@@ -183,10 +301,12 @@ class MinecraftCog(Cog, name="MinecraftServer"):
                     await self.get_server_players(ctx)
                 case "info":
                     await self.get_server_info(ctx)
+                case "history":
+                    await self.get_server_history(ctx, args[1:])
                 case _:
-                    await ctx.send("Please specify what you want to check: `status` or `players`", delete_after=120)
+                    await self.bot.outbound.send(ctx, "Please specify what you want to check: `status`, `players`, `info`, or `history`", delete_after=120)
         except:
-            await ctx.send("Server is offline", delete_after=20)
+            await self.bot.outbound.send(ctx, "Server is offline", delete_after=20)
 
     @command(
         name="infome",
@@ -211,7 +331,7 @@ class MinecraftCog(Cog, name="MinecraftServer"):
             author_icon_url=ctx.guild.icon.url if ctx.guild and ctx.guild.icon else None
         )
 
-        await ctx.send(embed=embed, delete_after=120)
+        await self.bot.outbound.send(ctx, embed=embed, delete_after=120)
 
     def has_role_id(role_ids):
         if isinstance(role_ids, int):
@@ -232,16 +352,17 @@ class MinecraftCog(Cog, name="MinecraftServer"):
     async def startserver(self, ctx):
         server_path = os.getenv("SERVER_PATH")
         try:
-            await self.run_rcon_async("/forge tps")
+            await self.query_tps()
 
-            await ctx.send("**🟢 Server is already online 🟢**", delete_after=120)
+            await self.bot.outbound.send(ctx, "**🟢 Server is already online 🟢**", delete_after=120)
         except:
             try:
                 if not server_path or not os.path.isfile(server_path):
-                    await ctx.send("❌ Invalid or missing server path in `.env` file.", delete_after=120)
+                    await self.bot.outbound.send(ctx, "❌ Invalid or missing server path in `.env` file.", delete_after=120)
                     return
 
                 server_dir = os.path.dirname(server_path)
+                self.reset_server_state()
 
                 if platform.system() == "Windows":
                     subprocess.Popen(["cmd", "/c", "start", "", server_path], cwd=server_dir, shell=True)
@@ -253,47 +374,142 @@ class MinecraftCog(Cog, name="MinecraftServer"):
                         executable="/bin/bash"
                     )
 
-                await ctx.send("✅ Server start command executed.", delete_after=120)
+                self.idle_monitor.wake()
+                await self.bot.outbound.send(ctx, "✅ Server start command executed.", delete_after=120)
             except Exception as e:
-                await ctx.send(f"❌ Failed to start server: `{str(e)}`", delete_after=120)
+                await self.bot.outbound.send(ctx, f"❌ Failed to start server: `{str(e)}`", delete_after=120)
         
     async def monitor_empty_server(self):
+        """
+        Shuts the server down once it has been empty for IDLE_SHUTDOWN_AFTER seconds.
+        How often it polls is left to `IdleMonitor`.
+        """
         await self.bot.wait_until_ready()
+        monitor = self.idle_monitor
         while not self.bot.is_closed():
             try:
-                resp = await self.run_rcon_async("/list")
-                pattern = re.compile(
-                    r"There are (?P<current>\d+) of a max of (?P<max>\d+) players online:(?P<names>.*)"
-                )
-                match = pattern.search(resp)
-                if match:
-                    current_players = int(match.group("current"))
-                    if current_players == 0:
-                        self.empty_counter += 1
-                        self.log.info(f"No players online. Idle counter: {self.empty_counter}/{self.shutdown_threshold}")
-                        
-                        if self.empty_counter == 4:
-                            channel = self.bot.get_channel(1300647901311139921)
-                            if channel:
-                                await channel.send("🛑 Shutting down the server in **1 minute** due to inactivity...", delete_after=60)
-                    else:
-                        self.empty_counter = 0
+                if self.online_players is not None and not self.online_players_due(time.monotonic()):
+                    players = {"current": len(self.online_players)}
+                elif self.online_players is not None:
+                    # The log can be stale (a replayed latest.log) or stop short (a crash), so check it now and then
+                    players = parse_player_list(await self.query_players())
+                    self.online_players_checked = time.monotonic()
+                    if players:
+                        self.online_players = set(players["players"])
+                else:
+                    resp = await self.query_players()
+                    if self.tps_command is None:
+                        await self.query_tps()
+                    players = parse_player_list(resp)
+
+                if players:
+                    was_online = monitor.online
+                    action = monitor.observe_players(players["current"], time.monotonic())
+                    if not was_online:
+                        self.log.info("Server is online, watching for inactivity")
+                    if monitor.empty_since is not None:
+                        self.log.info(f"No players online for {monitor.idle_seconds(time.monotonic()):.0f}s "
+                                      f"of {monitor.shutdown_after:.0f}s")
+
+                    if action == WARN:
+                        channel = self.bot.get_channel(MINECRAFT_CHANNEL)
+                        if channel:
+                            await self.bot.outbound.send(channel, f"🛑 Shutting down the server in **{monitor.warning_lead:.0f} seconds** due to inactivity...",
+                                                         delete_after=monitor.warning_lead)
 
-                    if self.empty_counter >= self.shutdown_threshold:
-                        self.log.info("No players for 5 minutes. Shutting down server.")
+                    elif action == SHUTDOWN:
+                        self.log.info(f"No players for {monitor.shutdown_after:.0f} seconds. Shutting down server.")
                         await self.run_rcon_async("/say [LPSM] Shutting down in 10 seconds due to inactivity. This can not be cancelled.")
                         await asyncio.sleep(10)
                         await self.run_rcon_async("/stop")
-                        channel = self.bot.get_channel(1300647901311139921)
+                        self.bot.rcon.reset()
+                        self.reset_server_state()
+                        self.online_players = None
+                        monitor.observe_offline()
+                        channel = self.bot.get_channel(MINECRAFT_CHANNEL)
                         if channel:
-                            await channel.send("🛑 Server Offline... 🛑", delete_after=120)
-
-                        self.empty_counter = 0  
-                        
-            except Exception as e:
-                self.empty_counter = 0 
+                            await self.bot.outbound.send(channel, "🛑 Server Offline... 🛑", delete_after=120)
+
+            except Exception:
+                if monitor.online:
+                    self.log.info("Server went offline")
+                monitor.observe_offline()
+                self.reset_server_state()
+                # The log said the server was up but it is not answering, e.g. after a crash
+                self.online_players = None
+
+            cache_stats = self.state_cache.stats()
+            if cache_stats != self.reported_cache_stats:
+                self.reported_cache_stats = cache_stats
+                self.log.info(f"Server state cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['coalesced']} coalesced")
+
+            await monitor.wait(time.monotonic())
+
+    def online_players_due(self, now: float) -> bool:
+        """Whether the players known from the log are due to be checked against /list."""
+        return self.online_players_checked is None or now - self.online_players_checked >= SERVER_LOG_RCON_CHECK_INTERVAL
+
+    def handle_log_event(self, event):
+        """
+        Keeps `online_players` in step with the server log, and wakes the idle
+        monitor whenever that changes its schedule, e.g. the last player leaving.
+        """
+        match event["type"]:
+            case "started":
+                self.online_players = set()
+                self.reset_server_state()
+                self.idle_monitor.wake()
+            case "stopping":
+                self.online_players = None
+                self.idle_monitor.wake()
+            case "join":
+                if self.online_players is None:
+                    self.online_players = set()
+                self.online_players.add(event["player"])
+                self.idle_monitor.wake()
+            case "leave":
+                if self.online_players is not None:
+                    self.online_players.discard(event["player"])
+                    if not self.online_players and not event["replayed"]:
+                        self.log.info(f"{event['player']} was the last player online, idle timer started")
+                self.idle_monitor.wake()
+            case "lag":
+                if not event["replayed"]:
+                    self.log.warning(f"Server can't keep up: {event['behind_ms']}ms ({event['ticks']} ticks) behind")
+                    self.history.record_lag(time.time(), int(event["behind_ms"]))
+
+    async def follow_server_log(self):
+        await self.bot.wait_until_ready()
+        self.log.info(f"Following server log at {self.log_tailer.path}")
+        async for event in self.log_tailer.events():
+            self.handle_log_event(event)
+
+    async def sample_server_history(self):
+        """
+        Records TPS and player count every HISTORY_SAMPLE_INTERVAL seconds while the
+        idle monitor sees the server online, so an offline server is left alone.
+        Player counts come from the server log when it tracks them, otherwise from
+        /list through the state cache, which shares round trips with the idle
+        monitor and user commands.
+        """
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            if self.idle_monitor.online:
+                try:
+                    now = time.time()
+                    if self.online_players is not None:
+                        self.history.record_players(now, len(self.online_players))
+                    else:
+                        players = parse_player_list(await self.query_players())
+                        if players:
+                            self.history.record_players(now, players["current"])
+                    if self.tps_command != NO_TPS_COMMAND:
+                        self.history.record_tps(now, parse_tps(await self.query_tps()))
+                except Exception:
+                    # The idle monitor notices the server going offline and stops sampling
+                    pass
 
-            await asyncio.sleep(60)
+            await asyncio.sleep(HISTORY_SAMPLE_INTERVAL)
 
     async def cog_after_invoke(self, ctx):
         args = ctx.args[2:]
@@ -316,8 +532,11 @@ class MinecraftCog(Cog, name="MinecraftServer"):
             footer="MinecraftCog Logger"
         )
 
-        channel = self.bot.get_channel(1406101545363308582)
-        await channel.send(embed=embed)
+        self.bot.audit_log.record(embed)
+
+    def cog_unload(self):
+        if self.log_tailer:
+            self.log_tailer.stop()
 
     @Cog.listener()
     async def on_ready(self):
@@ -326,4 +545,5 @@ class MinecraftCog(Cog, name="MinecraftServer"):
         await self.bot.mark_cog_ready(cog_name)
 
 async def setup(bot):
+    bot.mark_cog_imported(__name__.split(".")[-1])
     await bot.add_cog(MinecraftCog(bot))
\ No newline at end of file
@@ -1,9 +1,58 @@
 from tinydb import TinyDB, Query
+from dotenv import load_dotenv
+import os
 
-db = TinyDB("database.json")
-collection = db.table("users")
+from storage import AtomicJSONStorage, WriteBehindMiddleware
+from user_store import UserStore
+from sqlite_store import SQLiteUserStore
+
+load_dotenv()
+DB_BACKEND = os.getenv("DB_BACKEND", "tinydb").lower()
+DATABASE_PATH = os.getenv("DATABASE_PATH", "database.json")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "database.sqlite3")
+SYNC_CHECKPOINT_PATH = os.getenv("SYNC_CHECKPOINT_PATH", "sync_checkpoint.json")
+DB_FLUSH_INTERVAL = float(os.getenv("DB_FLUSH_INTERVAL", "5"))
+DB_FLUSH_THRESHOLD = int(os.getenv("DB_FLUSH_THRESHOLD", "100"))
+
+def open_store(backend: str = DB_BACKEND, path: str = None):
+    """
+    Opens the user store for the given backend.
+
+    Parameters:
+    -----------
+    backend : str
+        "tinydb" for the JSON file or "sqlite" for the SQLite database.
+    path : str, optional
+        Database file to open. Defaults to DATABASE_PATH or SQLITE_PATH.
+
+    Returns:
+    --------
+    UserStore or SQLiteUserStore
+        The opened store.
+    """
+    if backend == "sqlite":
+        return SQLiteUserStore(path or SQLITE_PATH)
+
+    if backend != "tinydb":
+        raise ValueError(f"Unknown DB_BACKEND {backend!r}, expected 'tinydb' or 'sqlite'")
+
+    db = TinyDB(path or DATABASE_PATH, storage=WriteBehindMiddleware(AtomicJSONStorage, flush_threshold=DB_FLUSH_THRESHOLD))
+    return UserStore(db.table("users"))
+
+store = open_store()
 QUERY = Query()
 
+def flush() -> bool:
+    """
+    Writes any buffered database changes to disk.
+
+    Returns:
+    --------
+    bool
+        True if pending changes were written, False if there were none.
+    """
+    return store.flush()
+
 def user_exists(discord_id: int) -> bool:
     """
     Checks if a user exists in the database based on their Discord ID.
@@ -18,7 +67,7 @@ def user_exists(discord_id: int) -> bool:
     bool
         True if the user exists, False otherwise.
     """
-    return get_user(QUERY.discord_id==discord_id) is not None
+    return store.get_by_discord_id(discord_id) is not None
 
 def insert_user(username, discord_id):
     """
@@ -31,12 +80,41 @@ def insert_user(username, discord_id):
         The user's Discord ID.
     """
     if not user_exists(discord_id):
-        collection.insert(
+        store.insert(
             {"username": username, 
              "discord_id": discord_id
             },
         )
 
+def insert_users(users: list) -> int:
+    """
+    Inserts many users in a single batched write. Users that already exist are skipped.
+
+    Parameters:
+    -----------
+    users : list of tuple (str, int)
+        (username, discord_id) pairs to insert.
+
+    Returns:
+    --------
+    int
+        Number of users actually inserted.
+    """
+    return store.insert_many(
+        [{"username": username, "discord_id": discord_id} for username, discord_id in users]
+    )
+
+def get_discord_ids() -> set:
+    """
+    Retrieves the Discord ID of every user in the database in one pass.
+
+    Returns:
+    --------
+    set of int
+        The stored Discord IDs.
+    """
+    return store.discord_ids()
+
 def update_user(discord_id: int, new_data: dict):
     """
     Updates user data for a given Discord ID.
@@ -50,13 +128,15 @@ def update_user(discord_id: int, new_data: dict):
         Example: {"username": "NewName", "minecraft": True}
     """
 
-    if user_exists(discord_id):
-        collection.update(new_data, QUERY.discord_id == discord_id)
+    store.update(discord_id, new_data)
 
 def get_user(query: Query):
     """
     Retrieves user documents from the database by query.
 
+    Equality queries on `discord_id`, `username` or `minecraft.username`
+    are answered from an index; any other query scans the cached users.
+
     Parameters:
     -----------
     query : str
@@ -67,7 +147,24 @@ def get_user(query: Query):
     dict or None
         The user document if found, otherwise None.
     """
-    return collection.get(query)
+    return store.find(query)
+
+def get_users_by_minecraft(minecraft_usernames: list[str]) -> dict:
+    """
+    Retrieves the users linked to several Minecraft accounts in one indexed lookup.
+
+    Parameters:
+    -----------
+    minecraft_usernames : list of str
+        The Minecraft usernames to look up.
+
+    Returns:
+    --------
+    dict
+        Maps each Minecraft username that has a user to its user document.
+        Usernames without a user are left out.
+    """
+    return store.get_many_by_minecraft(minecraft_usernames)
 
 def delete_user(username):
     """
@@ -83,7 +180,7 @@ def delete_user(username):
     list of int
         List of removed document IDs.
     """
-    return collection.remove(QUERY.username == username)
+    return store.remove_by_username(username)
 
 def get_users(is_sorted:bool = False):
     """
@@ -100,9 +197,67 @@ def get_users(is_sorted:bool = False):
         A list of user documents.
     """
     if is_sorted:
-        return sorted(collection.all(), key=lambda user: user.get("username", "").lower())
+        return store.all_sorted()
     
-    return collection.all()
+    return store.all()
+
+def count_users(minecraft_only: bool = False) -> int:
+    """
+    Counts the users in the database without loading them.
+
+    Parameters:
+    -----------
+    minecraft_only : bool
+        Only count users with a linked Minecraft account.
+
+    Returns:
+    --------
+    int
+        The number of users.
+    """
+    return store.count(minecraft_only)
+
+def get_users_page(offset: int, limit: int, minecraft_only: bool = False) -> list:
+    """
+    Retrieves one page of users sorted by username (case-insensitive), from
+    the store's username index, so only the page itself is read.
+
+    Parameters:
+    -----------
+    offset : int
+        Number of users to skip.
+    limit : int
+        Most users to return.
+    minecraft_only : bool
+        Only page through users with a linked Minecraft account.
+
+    Returns:
+    --------
+    list
+        The user documents of the page.
+    """
+    return store.page(offset, limit, minecraft_only)
+
+def get_users_after(cursor, limit: int, minecraft_only: bool = False) -> tuple:
+    """
+    Retrieves the users sorted by username that come after a cursor. Unlike an
+    offset, a cursor keeps its place when users are added or removed in between.
+
+    Parameters:
+    -----------
+    cursor : tuple or None
+        The cursor returned with the previous page, or None for the first page.
+    limit : int
+        Most users to return.
+    minecraft_only : bool
+        Only page through users with a linked Minecraft account.
+
+    Returns:
+    --------
+    tuple (list, tuple or None)
+        The user documents of the page, and the cursor of the next page or None after the last one.
+    """
+    return store.page_after(cursor, limit, minecraft_only)
 
 def link_minecraft(discord_id:int, minecraft_username:str, minecraft_password:str):
     """
@@ -123,4 +278,37 @@ def link_minecraft(discord_id:int, minecraft_username:str, minecraft_password:st
                 "linked": True,
                 }
             }
-    update_user(discord_id, data)
\ No newline at end of file
+    update_user(discord_id, data)
+
+def get_sync_checkpoint(guild_id: int) -> dict | None:
+    """
+    Retrieves the checkpoint saved by the last member sync of a guild.
+
+    Parameters:
+    -----------
+    guild_id : int
+        The guild the checkpoint belongs to.
+
+    Returns:
+    --------
+    dict or None
+        The saved checkpoint, or None if the guild was never synced.
+    """
+    checkpoints = AtomicJSONStorage(SYNC_CHECKPOINT_PATH).read() or {}
+    return checkpoints.get(str(guild_id))
+
+def save_sync_checkpoint(guild_id: int, checkpoint: dict):
+    """
+    Saves the result of a member sync so the next start-up can tell whether anything changed.
+
+    Parameters:
+    -----------
+    guild_id : int
+        The guild the checkpoint belongs to.
+    checkpoint : dict
+        Data describing the synced state, e.g. {"member_count": 120, "user_count": 118}.
+    """
+    storage = AtomicJSONStorage(SYNC_CHECKPOINT_PATH)
+    checkpoints = storage.read() or {}
+    checkpoints[str(guild_id)] = checkpoint
+    storage.write(checkpoints)
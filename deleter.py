@@ -0,0 +1,131 @@
+import asyncio
+import math
+import time
+from datetime import timedelta
+
+from discord import Forbidden, HTTPException, NotFound
+from discord.utils import utcnow
+
+BULK_DELETE_LIMIT = 100
+# Discord only bulk deletes messages younger than 14 days; leave a margin for clock skew.
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+
+class Deleter:
+    """
+    Deletes messages after a delay, batching them per channel.
+
+    Deletions are kept in per-tick buckets (a timer wheel like ExpiringMap's)
+    and one sweeper task removes everything that is due each tick. Due messages
+    in the same channel are removed with `channel.delete_messages`, up to 100
+    per call. Messages that cannot be bulk deleted (DMs, messages older than
+    14 days, a single message, or a refused bulk call) are deleted one by one.
+
+    Parameters:
+    -----------
+    log : logging.Logger
+        Where failures are reported.
+    resolution : float
+        Seconds between sweeps. Deletions that fall due in the same tick are batched.
+    """
+
+    def __init__(self, log, resolution: float = 1.0):
+        self.log = log
+        self.resolution = resolution
+
+        self.wheel: dict[int, list] = {}
+        self.sweeper: asyncio.Task | None = None
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self.deleted = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return sum(len(messages) for messages in self.wheel.values())
+
+    def _tick(self, timestamp: float) -> int:
+        return math.ceil(timestamp / self.resolution)
+
+    def schedule(self, message, delay: float = 0.0):
+        """Deletes `message` after `delay` seconds, at the next sweep at the earliest."""
+        tick = self._tick(time.monotonic() + delay)
+        self.wheel.setdefault(tick, []).append(message)
+
+        if self.sweeper is None or self.sweeper.done():
+            self.sweeper = asyncio.get_running_loop().create_task(self._sweep())
+
+    async def _sweep(self):
+        while self.wheel:
+            await asyncio.sleep(self.resolution)
+            await self.delete_due()
+
+    async def delete_due(self) -> int:
+        """Deletes every message that is due and returns how many were deleted."""
+        now = self._tick(time.monotonic())
+        by_channel: dict[int, list] = {}
+        for tick in sorted(t for t in self.wheel if t <= now):
+            for message in self.wheel.pop(tick):
+                by_channel.setdefault(message.channel.id, []).append(message)
+
+        deleted = await asyncio.gather(*(self._delete(messages) for messages in by_channel.values()))
+        return sum(deleted)
+
+    async def _delete(self, messages: list) -> int:
+        channel = messages[0].channel
+        single = []
+        bulk = []
+
+        if hasattr(channel, "delete_messages"):
+            cutoff = utcnow() - BULK_DELETE_MAX_AGE
+            for message in messages:
+                (bulk if message.created_at > cutoff else single).append(message)
+        else:
+            single = messages
+
+        deleted = 0
+        for start in range(0, len(bulk), BULK_DELETE_LIMIT):
+            chunk = bulk[start:start + BULK_DELETE_LIMIT]
+            if len(chunk) == 1:
+                single += chunk
+                continue
+            try:
+                await channel.delete_messages(chunk)
+                self.bulk_calls += 1
+                deleted += len(chunk)
+            except HTTPException as e:
+                self.log.warning(f"Bulk delete of {len(chunk)} message(s) failed, deleting one by one: {e}")
+                single += chunk
+
+        for message in single:
+            try:
+                await message.delete()
+                self.single_calls += 1
+                deleted += 1
+            except NotFound:
+                pass
+            except Forbidden:
+                self.failed += 1
+                self.log.warning(f"Missing permission to delete messages in {channel}")
+            except HTTPException as e:
+                self.failed += 1
+                self.log.warning(f"Failed to delete a message: {e}")
+
+        self.deleted += deleted
+        return deleted
+
+    async def close(self):
+        """Stops sweeping after deleting whatever is already due. Later deletions are dropped."""
+        if self.sweeper is not None:
+            self.sweeper.cancel()
+            self.sweeper = None
+        await self.delete_due()
+        self.wheel.clear()
+
+    def stats(self) -> dict:
+        return {
+            "scheduled": len(self),
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "bulk_calls": self.bulk_calls,
+            "single_calls": self.single_calls,
+        }
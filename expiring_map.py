@@ -0,0 +1,129 @@
+import asyncio
+import math
+import time
+
+
+class ExpiringMapFull(Exception):
+    """Raised when a new key is added to an ExpiringMap that is at capacity."""
+
+
+class ExpiringMap:
+    """
+    Dictionary whose entries expire `ttl` seconds after they were set.
+
+    Expiry times are rounded up to the next tick of `resolution` seconds and
+    kept in per-tick buckets (a timer wheel), so one sweeper task expires
+    every entry no matter how many there are. An optional secondary index
+    finds entries by a field of their value.
+
+    Parameters:
+    -----------
+    ttl : float
+        Seconds an entry lives.
+    capacity : int
+        Maximum number of entries. Adding a new key beyond it raises ExpiringMapFull.
+    index_key : callable, optional
+        Returns the secondary index key of a value.
+    on_expire : callable, optional
+        Called with (key, value) when an entry expires.
+    resolution : float
+        Seconds between sweeps.
+    """
+
+    def __init__(self, ttl: float, capacity: int, index_key=None, on_expire=None, resolution: float = 1.0):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.index_key = index_key
+        self.on_expire = on_expire
+        self.resolution = resolution
+
+        self.entries: dict = {}
+        self.index: dict[object, set] = {}
+        self.wheel: dict[int, set] = {}
+        self.sweeper: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def full(self) -> bool:
+        return len(self.entries) >= self.capacity
+
+    def _tick(self, timestamp: float) -> int:
+        return math.ceil(timestamp / self.resolution)
+
+    def set(self, key, value):
+        if key not in self.entries and len(self.entries) >= self.capacity:
+            raise ExpiringMapFull()
+
+        self.pop(key)
+
+        tick = self._tick(time.monotonic() + self.ttl)
+        self.entries[key] = (value, tick)
+        self.wheel.setdefault(tick, set()).add(key)
+        if self.index_key:
+            self.index.setdefault(self.index_key(value), set()).add(key)
+
+        if self.sweeper is None or self.sweeper.done():
+            self.sweeper = asyncio.get_running_loop().create_task(self._sweep())
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < self._tick(time.monotonic()):
+            return default
+        return entry[0]
+
+    def find(self, index_value, default=None):
+        """Returns a value whose secondary index key is `index_value`. Several values may share one."""
+        for key in self.index.get(index_value, ()):
+            value = self.get(key)
+            if value is not None:
+                return value
+        return default
+
+    def pop(self, key, default=None):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return default
+
+        value, tick = entry
+        bucket = self.wheel.get(tick)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self.wheel[tick]
+
+        if self.index_key:
+            index_value = self.index_key(value)
+            keys = self.index.get(index_value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.index[index_value]
+        return value
+
+    def expire(self) -> int:
+        """Removes every entry that is due and returns how many were removed."""
+        now = self._tick(time.monotonic())
+        expired = 0
+
+        for tick in sorted(t for t in self.wheel if t <= now):
+            for key in list(self.wheel.get(tick, ())):
+                value = self.pop(key)
+                expired += 1
+                if self.on_expire:
+                    self.on_expire(key, value)
+
+        return expired
+
+    async def _sweep(self):
+        while self.entries:
+            await asyncio.sleep(self.resolution)
+            self.expire()
+
+    def stop(self):
+        if self.sweeper is not None:
+            self.sweeper.cancel()
+            self.sweeper = None
@@ -0,0 +1,106 @@
+import asyncio
+
+WARN = "warn"
+SHUTDOWN = "shutdown"
+
+
+class IdleMonitor:
+    """
+    Decides when to check the Minecraft server for players and when an empty
+    server should be warned about and shut down. It only holds state and does
+    the scheduling; the caller does the RCON polling and acts on the result.
+
+    - Offline: polls back off exponentially from `poll_interval` up to `offline_poll_max`.
+    - Online with players: polls every `poll_interval`.
+    - Online and empty: sleeps until the warning is due, then polls every
+      `fast_poll_interval` so a player joining at the last minute is noticed.
+
+    Parameters:
+    -----------
+    shutdown_after : float
+        Seconds the server may stay empty before it is shut down.
+    warning_lead : float
+        Seconds before the shutdown at which to warn.
+    poll_interval : float
+        Normal seconds between polls.
+    fast_poll_interval : float
+        Seconds between polls once the warning is due.
+    offline_poll_max : float
+        Longest wait between polls while the server is offline.
+    """
+
+    def __init__(self, shutdown_after: float = 300, warning_lead: float = 60, poll_interval: float = 60,
+                 fast_poll_interval: float = 15, offline_poll_max: float = 900):
+        self.shutdown_after = shutdown_after
+        self.warning_lead = min(warning_lead, shutdown_after)
+        self.poll_interval = poll_interval
+        self.fast_poll_interval = fast_poll_interval
+        self.offline_poll_max = offline_poll_max
+
+        self.online = False
+        self.empty_since = None
+        self.warned = False
+        self.offline_polls = 0
+        self.wakeup = asyncio.Event()
+
+    def idle_seconds(self, now: float) -> float:
+        return 0.0 if self.empty_since is None else now - self.empty_since
+
+    def observe_offline(self):
+        self.online = False
+        self.empty_since = None
+        self.warned = False
+        self.offline_polls += 1
+
+    def observe_players(self, count: int, now: float) -> str | None:
+        """
+        Records a successful poll. Returns WARN once per idle stretch when the
+        warning is due, SHUTDOWN when the server has been empty for long enough,
+        otherwise None.
+        """
+        self.online = True
+        self.offline_polls = 0
+
+        if count:
+            self.empty_since = None
+            self.warned = False
+            return None
+
+        if self.empty_since is None:
+            self.empty_since = now
+
+        idle = now - self.empty_since
+        if idle >= self.shutdown_after:
+            return SHUTDOWN
+        if not self.warned and idle >= self.shutdown_after - self.warning_lead:
+            self.warned = True
+            return WARN
+        return None
+
+    def next_delay(self, now: float) -> float:
+        if not self.online:
+            if not self.offline_polls:
+                return self.poll_interval
+            return min(self.poll_interval * 2 ** (self.offline_polls - 1), self.offline_poll_max)
+
+        if self.empty_since is None:
+            return self.poll_interval
+
+        remaining = self.shutdown_after - self.idle_seconds(now)
+        until_warning = remaining - self.warning_lead
+        if until_warning > 0:
+            return min(self.poll_interval, until_warning)
+        return max(0.0, min(self.fast_poll_interval, remaining))
+
+    def wake(self):
+        """Ends the current wait early, e.g. right after the server was launched."""
+        self.offline_polls = 0
+        self.wakeup.set()
+
+    async def wait(self, now: float):
+        """Sleeps until the next poll is due or `wake` is called."""
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout=self.next_delay(now))
+        except asyncio.TimeoutError:
+            pass
+        self.wakeup.clear()
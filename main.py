@@ -1,20 +1,64 @@
 from discord.ext.commands import Bot as BotBase
 from discord import Intents, Member
 
+import asyncio
 import logging
+import time
 from pathlib import Path
-from db_utils import user_exists, insert_user
+from db_utils import (user_exists, insert_user, insert_users, get_discord_ids, flush, DB_FLUSH_INTERVAL,
+                      get_sync_checkpoint, save_sync_checkpoint)
+from rcon_pool import RCONPool
+from member_index import MemberIndex
+from audit_log import AuditLog
+from paginator import Paginator
+from outbound import Outbound, PRIORITY_NAMES
+from deleter import Deleter
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 PEPPER=os.getenv("PASSWORD_PEPPER")
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+PASSWORD_QUEUE_SIZE = int(os.getenv("PASSWORD_QUEUE_SIZE", "64"))
+PASSWORD_EXECUTOR = os.getenv("PASSWORD_EXECUTOR", "thread").lower()
+REGISTRATION_TTL = float(os.getenv("REGISTRATION_TTL", "60"))
+MAX_PENDING_REGISTRATIONS = int(os.getenv("MAX_PENDING_REGISTRATIONS", "500"))
+MAX_BULK_LOOKUP = int(os.getenv("MAX_BULK_LOOKUP", "200"))
+
+API_HOST = os.getenv("API_HOST", "localhost")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+# 0 serves the API on the bot's event loop, N runs it in N api_worker.py processes sharing API_PORT.
+API_WORKERS = int(os.getenv("API_WORKERS", "0"))
+API_RPC_SOCKET = os.getenv("API_RPC_SOCKET", "api_rpc.sock")
+API_RPC_TIMEOUT = float(os.getenv("API_RPC_TIMEOUT", "10"))
+# With API_WORKERS, the bot serves /metrics on this port and worker i on this port + 1 + i. 0 turns them off.
+API_METRICS_PORT = int(os.getenv("API_METRICS_PORT", "0"))
+
+# Cogs in cogs/ that are not loaded at all, e.g. "api" to run without the HTTP API and aiohttp.web.
+DISABLED_COGS = {name.strip() for name in os.getenv("DISABLED_COGS", "").split(",") if name.strip()}
 
 PREFIX = "@@"
 OWNER_IDS = [295377538967142410]
 ADMINS = []
 SERVER_ID = 749234556577513492
-MINECRAFT_CHANNEL = 1300647901311139921
+MINECRAFT_CHANNEL = int(os.getenv("MINECRAFT_CHANNEL", "1300647901311139921"))
+
+IDLE_SHUTDOWN_AFTER = float(os.getenv("IDLE_SHUTDOWN_AFTER", "300"))
+IDLE_WARNING_LEAD = float(os.getenv("IDLE_WARNING_LEAD", "60"))
+IDLE_POLL_INTERVAL = float(os.getenv("IDLE_POLL_INTERVAL", "60"))
+IDLE_FAST_POLL_INTERVAL = float(os.getenv("IDLE_FAST_POLL_INTERVAL", "15"))
+OFFLINE_POLL_MAX = float(os.getenv("OFFLINE_POLL_MAX", "900"))
+
+AUDIT_CHANNEL = int(os.getenv("AUDIT_CHANNEL", "1406101545363308582"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "5"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "500"))
+OUTBOUND_WORKERS = int(os.getenv("OUTBOUND_WORKERS", "4"))
+DELETE_RESOLUTION = float(os.getenv("DELETE_RESOLUTION", "1"))
+
+RCON_ADDRESS = os.getenv("RCON_ADDRESS", "localhost:25575")
+RCON_PASSWORD = os.getenv("RCON_PASSWORD", "")
+RCON_MAX_CONNECTIONS = int(os.getenv("RCON_MAX_CONNECTIONS", "2"))
+RCON_TIMEOUT = float(os.getenv("RCON_TIMEOUT", "5"))
 
 
 class Bot(BotBase):
@@ -24,31 +68,95 @@ class Bot(BotBase):
         intents.members = True
         self.ready = False
         self.cogs_ready = {}
+        self.cog_timings = {}
+        self.started_at = time.perf_counter()
 
         self.log = logging.getLogger("discord")
+        self.member_index = MemberIndex()
+        self.rcon = RCONPool(RCON_ADDRESS, RCON_PASSWORD, max_connections=RCON_MAX_CONNECTIONS, timeout=RCON_TIMEOUT)
+        self.deleter = Deleter(self.log, resolution=DELETE_RESOLUTION)
+        self.outbound = Outbound(workers=OUTBOUND_WORKERS, deleter=self.deleter)
+        self.audit_log = AuditLog(self, AUDIT_CHANNEL, flush_interval=AUDIT_FLUSH_INTERVAL, max_queue=AUDIT_QUEUE_SIZE)
 
         super().__init__(intents=intents, command_prefix=PREFIX, owner_ids=OWNER_IDS)
 
     async def setup_hook(self):
         self.add_check(self.globally_block_dms)
+        self.paginator = Paginator(outbound=self.outbound)
+        self.add_view(self.paginator)
         self.log.info("Initializing Cogs")
 
         cogs_dir = Path(__file__).parent / "cogs"
-        cog_files = [p for p in cogs_dir.glob("*.py") if p.name != "__init__.py"]
+        cog_files = [p for p in cogs_dir.glob("*.py") if p.name != "__init__.py" and p.stem not in DISABLED_COGS]
         cog_modules = [f"cogs.{p.stem}" for p in cog_files]
-        
+
         for cog in cog_modules:
-            self.log.info("{} cog loaded".format(cog.split(".")[-1]))
             self.cogs_ready[cog.split('.')[-1]] = False
-            await self.load_extension(cog)
+        if DISABLED_COGS:
+            self.log.info("Disabled cogs: {}".format(", ".join(sorted(DISABLED_COGS))))
+
+        # Extensions import and set up synchronously, so they load one after another.
+        # Slow work (the API server, numpy) waits until on_ready or first use instead.
+        for cog in cog_modules:
+            await self.load_cog(cog)
 
         self.log.info("All cogs loaded")
 
+        self.loop.create_task(self.flush_database())
+
+    async def load_cog(self, cog):
+        cog_name = cog.split(".")[-1]
+        timing = self.cog_timings[cog_name] = {"started": time.perf_counter()}
+        await self.load_extension(cog)
+        timing["loaded"] = time.perf_counter()
+        self.log.info("{} cog loaded".format(cog_name))
+
+    def mark_cog_imported(self, cog_name):
+        """Called first thing in a cog's `setup`, splitting its load time into import and setup."""
+        self.cog_timings[cog_name]["imported"] = time.perf_counter()
+
+    def log_startup_report(self):
+        self.log.info(f"{'Cog':<16}{'Import':>10}{'Setup':>10}{'Ready':>10}")
+        for cog_name, timing in sorted(self.cog_timings.items(), key=lambda item: item[1]["started"]):
+            imported = timing.get("imported", timing["loaded"])
+            import_ms = (imported - timing["started"]) * 1000
+            setup_ms = (timing["loaded"] - imported) * 1000
+            ready_s = timing["ready"] - self.started_at
+            self.log.info(f"{cog_name:<16}{import_ms:>8.0f}ms{setup_ms:>8.0f}ms{ready_s:>9.2f}s")
+
+    async def flush_database(self):
+        while not self.is_closed():
+            await asyncio.sleep(DB_FLUSH_INTERVAL)
+            flush()
+
+    async def close(self):
+        await self.audit_log.close()
+        audit_stats = self.audit_log.stats()
+        self.log.info(f"Audit log: {audit_stats['sent']} record(s) sent in {audit_stats['messages']} message(s), "
+                      f"{audit_stats['dropped']} dropped, {audit_stats['failed']} failed")
+        await self.outbound.close()
+        outbound_stats = self.outbound.stats()
+        for name in PRIORITY_NAMES.values():
+            stats = outbound_stats[name]
+            if stats["sent"] + stats["failed"]:
+                self.log.info(f"Outbound {name}: {stats['sent']} sent, {stats['failed']} failed, queue delay "
+                              f"mean {stats['mean_delay'] * 1000:.0f} ms, max {stats['max_delay'] * 1000:.0f} ms")
+        await self.deleter.close()
+        deleter_stats = self.deleter.stats()
+        self.log.info(f"Deleter: {deleter_stats['deleted']} message(s) deleted in {deleter_stats['bulk_calls']} bulk and "
+                      f"{deleter_stats['single_calls']} single call(s), {deleter_stats['failed']} failed")
+        await super().close()
+        self.rcon.close()
+        if flush():
+            self.log.info("Database flushed on shutdown")
+
     async def mark_cog_ready(self, cog_name):
         self.cogs_ready[cog_name] = True
+        self.cog_timings[cog_name].setdefault("ready", time.perf_counter())
         if all(self.cogs_ready.values()) and not self.ready:
             self.ready = True
             self.log.info(f'Logged in as {self.user} ({self.user.id})')
+            self.log_startup_report()
             self.log.info("✅ Setup complete")
 
 
@@ -62,17 +170,44 @@ class Bot(BotBase):
         self.log.info("Syncing user database...")
         for guild in self.guilds:
             if guild.id == SERVER_ID:
-                async for member in guild.fetch_members(limit=None):
-                        if member.bot:
-                            continue
-                        if not user_exists(member.id):
-                            insert_user(member.name, member.id)
-                            self.log.info(f"   |-Added new user to DB: {member.name} ({member.id})")
+                self.member_index.build(guild.members)
+                await self.sync_users(guild)
         self.log.info("User database sync complete")
+
+    async def sync_users(self, guild):
+        start = time.perf_counter()
+        known_ids = get_discord_ids()
+        checkpoint = {"member_count": guild.member_count, "user_count": len(known_ids)}
+
+        if guild.chunked:
+            members = guild.members
+            source = "gateway cache"
+        elif get_sync_checkpoint(guild.id) == checkpoint:
+            self.log.info(f"   |-No member changes since the last sync, skipped fetching {guild.member_count} members")
+            return
+        else:
+            members = [member async for member in guild.fetch_members(limit=None)]
+            source = "REST"
+
+        missing = {member.id: member for member in members if not member.bot and member.id not in known_ids}
+        added = insert_users([(member.name, member.id) for member in missing.values()])
+
+        for member in missing.values():
+            self.log.info(f"   |-Added new user to DB: {member.name} ({member.id})")
+
+        checkpoint["user_count"] = len(known_ids) + added
+        save_sync_checkpoint(guild.id, checkpoint)
+
+        self.log.info(
+            f"   |-Synced {len(members)} members from {source} against {len(known_ids)} users: "
+            f"{added} added in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
     
     async def on_member_join(self, member: Member):
         if member.guild.id != SERVER_ID:
             return
+
+        self.member_index.add(member)
         
         if member.bot:
             return
@@ -83,6 +218,14 @@ class Bot(BotBase):
         else:
             self.log.info(f"   |-Existing member rejoined: {member.name} ({member.id})")
 
+    async def on_member_remove(self, member: Member):
+        if member.guild.id == SERVER_ID:
+            self.member_index.remove(member)
+
+    async def on_member_update(self, before: Member, after: Member):
+        if after.guild.id == SERVER_ID:
+            self.member_index.update(before, after)
+
     async def globally_block_dms(self, ctx):
         return ctx.guild is not None
 
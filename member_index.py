@@ -0,0 +1,84 @@
+from discord import Member
+
+
+class MemberIndex:
+    """
+    Lookup tables for the members of one guild, keyed by ID, `name`,
+    `display_name` and a case-folded form of both names.
+
+    Names can be shared between members, so every name key keeps its members
+    in insertion order and a lookup returns the first one, which matches the
+    old behaviour of walking `guild.members`.
+    """
+
+    def __init__(self):
+        self.built = False
+        self.by_id: dict[int, Member] = {}
+        self.by_name: dict[str, dict[int, Member]] = {}
+        self.by_display_name: dict[str, dict[int, Member]] = {}
+        self.by_folded_name: dict[str, dict[int, Member]] = {}
+        # discord.py updates cached members in place, so the keys a member was
+        # indexed under are remembered rather than recomputed on removal.
+        self.indexed_keys: dict[int, list[tuple[str, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    @staticmethod
+    def _keys(member: Member) -> list[tuple[str, str]]:
+        return [
+            ("by_name", member.name),
+            ("by_display_name", member.display_name),
+            ("by_folded_name", member.name.casefold()),
+            ("by_folded_name", member.display_name.casefold()),
+        ]
+
+    def build(self, members):
+        self.by_id.clear()
+        self.by_name.clear()
+        self.by_display_name.clear()
+        self.by_folded_name.clear()
+        self.indexed_keys.clear()
+
+        for member in members:
+            self.add(member)
+        self.built = True
+
+    def add(self, member: Member):
+        self.remove(member)
+        self.by_id[member.id] = member
+        self.indexed_keys[member.id] = self._keys(member)
+        for table, key in self.indexed_keys[member.id]:
+            getattr(self, table).setdefault(key, {})[member.id] = member
+
+    def remove(self, member: Member):
+        self.by_id.pop(member.id, None)
+        for table_name, key in self.indexed_keys.pop(member.id, ()):
+            table = getattr(self, table_name)
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.pop(member.id, None)
+                if not bucket:
+                    del table[key]
+
+    def update(self, before: Member, after: Member):
+        self.remove(before)
+        self.add(after)
+
+    @staticmethod
+    def _first(bucket):
+        return next(iter(bucket.values())) if bucket else None
+
+    def lookup(self, target: str) -> Member | None:
+        """
+        Finds a member by ID, exact name, exact display name, or failing those,
+        a case-insensitive match on either name.
+        """
+        if target.isdigit():
+            return self.by_id.get(int(target))
+
+        return (
+            self._first(self.by_name.get(target))
+            or self._first(self.by_display_name.get(target))
+            or self._first(self.by_folded_name.get(target.casefold()))
+        )
@@ -0,0 +1,155 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from aiohttp import web
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(**labels) -> str:
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+class Histogram:
+    """Fixed-bucket latency histogram. Observing a value is one bisect and two additions."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: dict) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{{{_labels(**labels, le=bound)}}} {cumulative}")
+        lines.append(f"{name}_bucket{{{_labels(**labels, le='+Inf')}}} {self.count}")
+        lines.append(f"{name}_sum{{{_labels(**labels)}}} {self.sum}")
+        lines.append(f"{name}_count{{{_labels(**labels)}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    """
+    In-process metrics for the API server: request counts per route, method
+    and status, per-route latency histograms, and histograms for named
+    sub-stages such as DB lookups. `render()` produces Prometheus text format.
+    """
+
+    def __init__(self, prefix: str = "lpsm"):
+        self.prefix = prefix
+        self.requests: dict[tuple, int] = {}
+        self.latency: dict[tuple, Histogram] = {}
+        self.stages: dict[str, Histogram] = {}
+        self.gauges: dict[str, tuple] = {}
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        key = (route, method, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        histogram = self.latency.get((route, method))
+        if histogram is None:
+            histogram = self.latency[(route, method)] = Histogram()
+        histogram.observe(seconds)
+
+    def observe_stage(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def time_stage(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start)
+
+    def register_gauge(self, name: str, help_text: str, read):
+        """Adds a gauge whose value is read by calling `read()` at scrape time."""
+        self.gauges[name] = (help_text, read)
+
+    def render(self) -> str:
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_http_requests_total HTTP requests handled, by route, method and status.",
+            f"# TYPE {p}_http_requests_total counter",
+        ]
+        for (route, method, status), count in sorted(self.requests.items()):
+            lines.append(f"{p}_http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}")
+
+        lines += [
+            f"# HELP {p}_http_request_duration_seconds HTTP request latency, by route and method.",
+            f"# TYPE {p}_http_request_duration_seconds histogram",
+        ]
+        for (route, method), histogram in sorted(self.latency.items()):
+            lines += histogram.render(f"{p}_http_request_duration_seconds", {"route": route, "method": method})
+
+        lines += [
+            f"# HELP {p}_stage_duration_seconds Time spent in request sub-stages.",
+            f"# TYPE {p}_stage_duration_seconds histogram",
+        ]
+        for stage, histogram in sorted(self.stages.items()):
+            lines += histogram.render(f"{p}_stage_duration_seconds", {"stage": stage})
+
+        for name, (help_text, read) in sorted(self.gauges.items()):
+            lines += [
+                f"# HELP {p}_{name} {help_text}",
+                f"# TYPE {p}_{name} gauge",
+                f"{p}_{name} {read()}",
+            ]
+
+        return "\n".join(lines) + "\n"
+
+
+def metrics_middleware(metrics: Metrics):
+    """Creates an aiohttp middleware that records every request into `metrics`."""
+
+    @web.middleware
+    async def middleware(request, handler):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            resource = request.match_info.route.resource
+            route = resource.canonical if resource is not None else "unmatched"
+            metrics.observe_request(route, request.method, status, time.perf_counter() - start)
+
+    return middleware
+
+
+def metrics_handler(metrics: Metrics):
+    """Creates an aiohttp handler that serves `metrics` in Prometheus text format."""
+
+    async def handler(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    return handler
+
+
+async def start_metrics_server(metrics: Metrics, host: str, port: int) -> web.AppRunner:
+    """Serves only GET /metrics for `metrics` on host:port. Returns the runner, for cleanup."""
+    app = web.Application()
+    app.add_routes([web.get('/metrics', metrics_handler(metrics))])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,48 @@
+"""
+One-shot migration of the TinyDB user table (database.json) into the SQLite
+backend. Run it while the bot is stopped, then set DB_BACKEND=sqlite.
+
+Usage:
+    python migrate_db.py [--source database.json] [--target database.sqlite3]
+"""
+import argparse
+import sys
+
+from storage import AtomicJSONStorage
+from sqlite_store import SQLiteUserStore
+
+
+def migrate(source: str, target: str) -> int:
+    data = AtomicJSONStorage(source).read() or {}
+    table = data.get("users", {})
+    documents = [table[doc_id] for doc_id in sorted(table, key=int)]
+
+    store = SQLiteUserStore(target)
+    try:
+        if len(store):
+            print(f"❌ {target} already contains {len(store)} users. Refusing to migrate into it.")
+            return 1
+
+        store.insert_many(documents)
+        migrated = len(store)
+    finally:
+        store.close()
+
+    print(f"Source users: {len(documents)}")
+    print(f"Migrated users: {migrated}")
+
+    if migrated != len(documents):
+        print("❌ Row counts do not match. Check the source for duplicate Discord IDs.")
+        return 1
+
+    print("✅ Migration complete")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate database.json into SQLite.")
+    parser.add_argument("--source", default="database.json")
+    parser.add_argument("--target", default="database.sqlite3")
+    args = parser.parse_args()
+
+    sys.exit(migrate(args.source, args.target))
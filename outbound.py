@@ -0,0 +1,217 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+OTP = 0
+REPLY = 1
+AUDIT = 2
+PRIORITY_NAMES = {OTP: "otp", REPLY: "reply", AUDIT: "audit"}
+MAX_IDLE_ROUTES = 256
+
+
+def route_key(destination) -> tuple:
+    """
+    The rate limit route a message to `destination` goes through: the channel
+    for a context, message or channel, and the DM channel for a user.
+    """
+    channel = getattr(destination, "channel", None)
+    if channel is not None:
+        return ("channel", channel.id)
+    if hasattr(destination, "discriminator"):
+        return ("user", destination.id)
+    return ("channel", destination.id)
+
+
+class Route:
+    """Messages waiting for one destination and its token bucket."""
+
+    def __init__(self, key: tuple, rate: int, per: float):
+        self.key = key
+        self.items: list = []
+        self.busy = False
+        self.delayed = False
+        self.queued_priority = None
+
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Takes a token and returns 0, or returns how many seconds until one is available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * self.per / self.rate
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return not self.items and not self.busy and not self.delayed and self.tokens >= self.rate
+
+
+class Outbound:
+    """
+    Single queue for every message the bot sends.
+
+    Each message has a priority class (OTP DMs, then user replies, then audit
+    logs) and a route, its channel or DM. Workers always take the most urgent
+    message whose route is free. A route sends one message at a time and has
+    its own token bucket that mirrors Discord's per-channel limit, so a route
+    that runs out of tokens waits on a timer instead of holding a worker. A
+    burst of audit logs therefore never delays an OTP DM or a reply in another
+    channel.
+
+    Parameters:
+    -----------
+    workers : int
+        Messages sent at the same time.
+    route_rate : int
+        Messages a route may send every `route_per` seconds.
+    route_per : float
+        Length of a route's rate limit window in seconds.
+    deleter : Deleter, optional
+        Takes over `delete_after`, so expiring messages are deleted in batches
+        instead of each by its own timer. Left to discord.py when None.
+    """
+
+    def __init__(self, workers: int = 4, route_rate: int = 5, route_per: float = 5.0, deleter=None):
+        self.workers = workers
+        self.route_rate = route_rate
+        self.route_per = route_per
+        self.deleter = deleter
+
+        self.routes: dict[tuple, Route] = {}
+        self.ready: asyncio.PriorityQueue | None = None
+        self.tasks: list[asyncio.Task] = []
+        self.sequence = itertools.count()
+        self.queued = 0
+        self.classes = {
+            name: {"sent": 0, "failed": 0, "total_delay": 0.0, "max_delay": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    def __len__(self) -> int:
+        return self.queued
+
+    def _start(self):
+        if self.ready is None:
+            self.ready = asyncio.PriorityQueue()
+        self.tasks = [task for task in self.tasks if not task.done()]
+        loop = asyncio.get_running_loop()
+        while len(self.tasks) < self.workers:
+            self.tasks.append(loop.create_task(self._work()))
+
+    def _schedule(self, route: Route):
+        if route.busy or route.delayed or not route.items:
+            return
+
+        priority = route.items[0][0]
+        if route.queued_priority is not None and route.queued_priority <= priority:
+            return
+        route.queued_priority = priority
+        self.ready.put_nowait((priority, next(self.sequence), route.key))
+
+    def _release(self, route: Route):
+        route.delayed = False
+        self._schedule(route)
+
+    async def send(self, destination, *args, priority: int = REPLY, **kwargs):
+        """
+        Queues `destination.send(*args, **kwargs)` and waits until it is sent.
+
+        Returns:
+        --------
+        discord.Message
+            The sent message, or whatever the destination's send returned.
+        """
+        self._start()
+
+        key = route_key(destination)
+        route = self.routes.get(key)
+        if route is None:
+            if len(self.routes) >= MAX_IDLE_ROUTES:
+                self._prune()
+            route = self.routes[key] = Route(key, self.route_rate, self.route_per)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(route.items, (priority, next(self.sequence), time.monotonic(), future,
+                                     destination, args, kwargs))
+        self.queued += 1
+        self._schedule(route)
+        return await future
+
+    async def _work(self):
+        while True:
+            priority, _, key = await self.ready.get()
+            route = self.routes.get(key)
+            if route is None or route.queued_priority != priority or route.busy or not route.items:
+                continue
+            route.queued_priority = None
+
+            wait = route.take(time.monotonic())
+            if wait:
+                route.delayed = True
+                asyncio.get_running_loop().call_later(wait, self._release, route)
+                continue
+
+            route.busy = True
+            priority, _, queued_at, future, destination, args, kwargs = heapq.heappop(route.items)
+            self.queued -= 1
+
+            stats = self.classes[PRIORITY_NAMES[priority]]
+            delay = time.monotonic() - queued_at
+            stats["total_delay"] += delay
+            stats["max_delay"] = max(stats["max_delay"], delay)
+
+            delete_after = kwargs.pop("delete_after", None) if self.deleter is not None else None
+            try:
+                if not future.cancelled():
+                    result = await destination.send(*args, **kwargs)
+                    stats["sent"] += 1
+                    if delete_after is not None and result is not None:
+                        self.deleter.schedule(result, delete_after)
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                stats["failed"] += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                route.busy = False
+                self._schedule(route)
+
+    def _prune(self):
+        """Forgets routes with nothing queued and a full bucket, e.g. DMs to users who are long gone."""
+        now = time.monotonic()
+        for key in [key for key, route in self.routes.items() if route.idle(now)]:
+            del self.routes[key]
+
+    async def close(self, timeout: float = 10.0):
+        """Waits up to `timeout` seconds for queued messages to be sent, then stops the workers."""
+        deadline = time.monotonic() + timeout
+        while self.queued and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def stats(self) -> dict:
+        """Sent and failed counts and queue delay in seconds per priority class."""
+        stats = {"queued": self.queued, "routes": len(self.routes)}
+        for name, values in self.classes.items():
+            handled = values["sent"] + values["failed"]
+            stats[name] = {
+                "sent": values["sent"],
+                "failed": values["failed"],
+                "mean_delay": values["total_delay"] / handled if handled else 0.0,
+                "max_delay": values["max_delay"],
+            }
+        return stats
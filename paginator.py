@@ -0,0 +1,96 @@
+from functools import partial
+
+import discord
+from discord.utils import maybe_coroutine
+
+from expiring_map import ExpiringMap, ExpiringMapFull
+
+
+class Paginator(discord.ui.View):
+    """
+    One persistent view with ⬅️/➡️ buttons shared by every paginated message.
+
+    Buttons have fixed custom IDs, so discord.py routes each click straight to
+    this view, and the view finds the message's page state by message ID. Pages
+    are rendered on demand and a click is answered by editing the message in
+    the interaction response, with no reactions to add or remove.
+
+    Register it once with `bot.add_view(paginator)` and send pages with `send`.
+
+    Parameters:
+    -----------
+    ttl : float
+        Seconds a message can be paged after it is sent.
+    capacity : int
+        Most messages that can be paged at once. Past it, messages are sent
+        without buttons.
+    outbound : Outbound, optional
+        Queue the first page is sent through; sent directly when None.
+    """
+
+    def __init__(self, ttl: float = 120, capacity: int = 1000, outbound=None):
+        super().__init__(timeout=None)
+        self.ttl = ttl
+        self.outbound = outbound
+        self.sessions = ExpiringMap(ttl, capacity)
+
+    async def send(self, ctx, render, total_pages: int, **kwargs):
+        """
+        Sends page 0 of `render` and lets the command's author flip through the rest.
+
+        Parameters:
+        -----------
+        ctx : Context
+            Where to send the message; only `ctx.author` can change pages.
+        render : callable
+            Takes a page index and returns (or resolves to) the page's embed.
+        total_pages : int
+            Number of pages. Pages wrap around at either end.
+        **kwargs
+            Passed on to `ctx.send`, e.g. delete_after, which goes to the
+            outbound queue's deleter when there is one.
+
+        Returns:
+        --------
+        discord.Message
+            The sent message.
+        """
+        send = partial(self.outbound.send, ctx) if self.outbound else ctx.send
+
+        embed = await maybe_coroutine(render, 0)
+        if total_pages <= 1 or self.sessions.full():
+            return await send(embed=embed, **kwargs)
+
+        message = await send(embed=embed, view=self, **kwargs)
+        try:
+            self.sessions.set(message.id, {
+                "owner_id": ctx.author.id,
+                "render": render,
+                "total_pages": total_pages,
+                "page": 0,
+            })
+        except ExpiringMapFull:
+            await message.edit(view=None)
+        return message
+
+    async def flip(self, interaction: discord.Interaction, step: int):
+        session = self.sessions.get(interaction.message.id)
+        if session is None:
+            await interaction.response.edit_message(view=None)
+            return
+
+        if interaction.user.id != session["owner_id"]:
+            await interaction.response.send_message("Only the person who asked for this list can change its page.", ephemeral=True)
+            return
+
+        session["page"] = (session["page"] + step) % session["total_pages"]
+        embed = await maybe_coroutine(session["render"], session["page"])
+        await interaction.response.edit_message(embed=embed)
+
+    @discord.ui.button(emoji="⬅️", custom_id="lpsm:paginator:previous")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.flip(interaction, -1)
+
+    @discord.ui.button(emoji="➡️", custom_id="lpsm:paginator:next")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.flip(interaction, 1)
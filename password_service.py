@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils import hash_password, verify_password
+
+log = logging.getLogger("discord")
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when more password operations are waiting than the queue allows."""
+
+
+class PasswordService:
+    """
+    Runs Argon2 hashing and verification on a worker pool so they never block
+    the event loop that carries the Discord gateway.
+
+    Parameters:
+    -----------
+    pepper : str
+        The password pepper appended before hashing.
+    workers : int
+        Number of worker threads or processes.
+    max_queue : int
+        Maximum number of operations in flight. Further calls raise PasswordServiceBusy.
+    use_processes : bool
+        Use a ProcessPoolExecutor instead of a ThreadPoolExecutor.
+    """
+
+    def __init__(self, pepper: str, workers: int = 2, max_queue: int = 64, use_processes: bool = False):
+        self.pepper = pepper
+        self.workers = workers
+        self.max_queue = max_queue
+
+        if use_processes:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+
+        self.in_flight = 0
+        self.latency = {
+            "hash": {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+            "verify": {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+        }
+
+    async def _run(self, operation: str, func, *args):
+        if self.in_flight >= self.max_queue:
+            log.warning(f"Password queue full ({self.in_flight} in flight), rejecting {operation}")
+            raise PasswordServiceBusy()
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+            elapsed = time.perf_counter() - start
+            stats = self.latency[operation]
+            stats["count"] += 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+    async def hash(self, raw_password: str) -> str:
+        return await self._run("hash", hash_password, raw_password, self.pepper)
+
+    async def verify(self, input_password: str, stored_hash: str) -> bool:
+        return await self._run("verify", verify_password, input_password, stored_hash, self.pepper)
+
+    def stats(self) -> dict:
+        """
+        Returns the current queue depth and per-operation latency.
+
+        Returns:
+        --------
+        dict
+            {"in_flight": int, "queued": int, "hash": {...}, "verify": {...}} where each
+            operation has count, total_seconds, max_seconds and mean_seconds.
+        """
+        stats = {
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+        }
+        for operation, latency in self.latency.items():
+            mean = latency["total_seconds"] / latency["count"] if latency["count"] else 0.0
+            stats[operation] = {**latency, "mean_seconds": mean}
+        return stats
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+
+from asyncrcon import AsyncRCON, AuthenticationException
+
+log = logging.getLogger("discord")
+
+
+class RCONPool:
+    """
+    Keeps a bounded set of authenticated RCON connections open and shares them
+    between callers, so a command does not pay for a TCP handshake and login.
+
+    Connections that have been idle for longer than `health_check_after`
+    seconds are checked before reuse, and a connection that fails mid-command
+    is thrown away and the command is retried once on a fresh one.
+
+    Parameters:
+    -----------
+    address : str
+        RCON address and port, e.g. "localhost:25575".
+    password : str
+        RCON password from server.properties.
+    max_connections : int
+        Upper bound on connections open at the same time.
+    timeout : float
+        Seconds a single command (or login) may take before it is abandoned.
+    health_check_after : float
+        Idle seconds after which a pooled connection is checked before use.
+    """
+
+    def __init__(self, address: str, password: str, max_connections: int = 2,
+                 timeout: float = 5.0, health_check_after: float = 30.0):
+        self.address = address
+        self.password = password
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.idle: list[tuple[AsyncRCON, float]] = []
+        self.closed = False
+
+    async def _connect(self) -> AsyncRCON:
+        rcon = AsyncRCON(self.address, self.password, auto_reconnect=False)
+        try:
+            await asyncio.wait_for(rcon.open_connection(), self.timeout)
+        except BaseException:
+            self._discard(rcon)
+            raise
+        return rcon
+
+    def _discard(self, rcon: AsyncRCON):
+        try:
+            rcon.close()
+        except Exception:
+            pass
+
+    async def _healthy(self, rcon: AsyncRCON) -> bool:
+        try:
+            await asyncio.wait_for(rcon.command(""), self.timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _acquire(self) -> tuple[AsyncRCON, bool]:
+        while self.idle:
+            rcon, last_used = self.idle.pop()
+            if time.monotonic() - last_used < self.health_check_after or await self._healthy(rcon):
+                return rcon, True
+            self._discard(rcon)
+
+        return await self._connect(), False
+
+    async def command(self, command: str) -> str:
+        """
+        Runs a command over a pooled connection.
+
+        Raises:
+        -------
+        AuthenticationException
+            The RCON password was rejected.
+        OSError, asyncio.TimeoutError
+            The server could not be reached or did not answer in time.
+        """
+        if self.closed:
+            raise RuntimeError("RCON pool is closed")
+
+        async with self.semaphore:
+            rcon, reused = await self._acquire()
+            try:
+                res = await asyncio.wait_for(rcon.command(command), self.timeout)
+            except AuthenticationException:
+                self._discard(rcon)
+                raise
+            except Exception:
+                self._discard(rcon)
+                if not reused:
+                    raise
+
+                # The pooled connection went stale (e.g. the server restarted), try once more on a new one.
+                rcon = await self._connect()
+                try:
+                    res = await asyncio.wait_for(rcon.command(command), self.timeout)
+                except BaseException:
+                    self._discard(rcon)
+                    raise
+
+            self.idle.append((rcon, time.monotonic()))
+            return res
+
+    def reset(self):
+        """Drops every idle connection, e.g. after the server was stopped."""
+        while self.idle:
+            rcon, _ = self.idle.pop()
+            self._discard(rcon)
+
+    def close(self):
+        self.closed = True
+        self.reset()
+        log.info("RCON pool closed")
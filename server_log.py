@@ -0,0 +1,128 @@
+import asyncio
+import os
+import re
+
+LINE_PATTERN = re.compile(
+    # Vanilla/Forge: "[12:34:56] [Server thread/INFO]: msg", "[...] [Server thread/INFO] [logger/]: msg"
+    # Fabric: "[12:34:56] [Server thread/INFO] (Minecraft) msg"
+    r"^\[[^\]]*\] \[(?P<thread>[^\]]*)\](?: \[[^\]]*\])?(?:: | \([^)]*\) )(?P<message>.*)$"
+)
+EVENT_PATTERNS = [
+    ("join", re.compile(r"^(?P<player>\w{1,16}) joined the game$")),
+    ("leave", re.compile(r"^(?P<player>\w{1,16}) left the game$")),
+    ("lag", re.compile(r"^Can't keep up! Is the server overloaded\? Running (?P<behind_ms>\d+)ms or (?P<ticks>\d+) ticks behind")),
+    ("started", re.compile(r'^Done \((?P<seconds>[\d.]+)s\)! For help, type "help"')),
+    ("stopping", re.compile(r"^Stopping server$")),
+]
+MAX_READ = 1 << 20
+
+
+def parse_log_line(line: str) -> dict | None:
+    """
+    Parses a server log line into an event such as {"type": "join", "player": "Steve"},
+    or returns None for lines that are not one of the events in EVENT_PATTERNS.
+    """
+    match = LINE_PATTERN.match(line)
+    if not match or not match.group("thread").startswith("Server thread"):
+        return None
+
+    message = match.group("message")
+    for event_type, pattern in EVENT_PATTERNS:
+        event = pattern.match(message)
+        if event:
+            return {"type": event_type, **event.groupdict()}
+    return None
+
+
+class LogTailer:
+    """
+    Follows a log file such as the server's logs/latest.log and yields parsed events.
+
+    The file is reopened on every poll instead of being held open, so the server
+    can still rotate it on Windows. Rotation is noticed by the file's inode
+    changing, truncation by it shrinking; either way reading restarts at the top.
+
+    Parameters:
+    -----------
+    path : str
+        The log file to follow. It does not have to exist yet.
+    poll_interval : float
+        Seconds to wait before checking for new lines when there were none.
+    from_start : bool
+        Whether to replay the file that exists at startup. Lines read in that first
+        pass are marked "replayed", which lets callers rebuild state without
+        treating old lines as new.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 1.0, from_start: bool = True):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+
+        self.inode = None
+        self.offset = 0
+        self.partial = b""
+        self.replay_until = 0
+        self.rotations = 0
+        self.truncations = 0
+        self.stopped = False
+
+    def _read(self) -> list[tuple[str, bool]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+
+        if stat.st_ino != self.inode:
+            if self.inode is None:
+                self.offset = 0 if self.from_start else stat.st_size
+                self.replay_until = stat.st_size
+            else:
+                self.rotations += 1
+                self.offset = 0
+                self.replay_until = 0
+            self.inode = stat.st_ino
+            self.partial = b""
+        elif stat.st_size < self.offset:
+            self.truncations += 1
+            self.offset = 0
+            self.replay_until = 0
+            self.partial = b""
+
+        if stat.st_size == self.offset:
+            return []
+
+        with open(self.path, "rb") as handle:
+            handle.seek(self.offset)
+            data = handle.read(MAX_READ)
+
+        # Byte offset in the file where each complete line ends, to tell replayed lines apart
+        end = self.offset - len(self.partial)
+        self.offset += len(data)
+        *complete, self.partial = (self.partial + data).split(b"\n")
+
+        lines = []
+        for raw in complete:
+            end += len(raw) + 1
+            lines.append((raw.decode("utf-8", errors="replace").rstrip("\r"), end <= self.replay_until))
+        return lines
+
+    async def lines(self):
+        """Yields (line, replayed) for every complete line, waiting for more at the end of the file."""
+        while not self.stopped:
+            lines = await asyncio.to_thread(self._read)
+            for line in lines:
+                yield line
+            if not lines:
+                await asyncio.sleep(self.poll_interval)
+
+    async def events(self):
+        """Yields events from `parse_log_line`, with a "replayed" flag added."""
+        async for line, replayed in self.lines():
+            event = parse_log_line(line)
+            if event:
+                event["replayed"] = replayed
+                yield event
+
+    def stop(self):
+        self.stopped = True
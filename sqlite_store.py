@@ -0,0 +1,302 @@
+import json
+import sqlite3
+import time
+
+from user_store import normalize_id, indexed_getter
+from expiring_map import ExpiringMapFull
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    discord_id INTEGER,
+    username TEXT,
+    username_key TEXT,
+    minecraft_username TEXT,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_discord_id ON users (discord_id);
+CREATE INDEX IF NOT EXISTS users_username ON users (username);
+CREATE INDEX IF NOT EXISTS users_username_key ON users (username_key, id);
+CREATE INDEX IF NOT EXISTS users_minecraft_username ON users (minecraft_username);
+CREATE INDEX IF NOT EXISTS users_linked_username_key ON users (username_key, id) WHERE minecraft_username IS NOT NULL;
+"""
+
+
+def _columns(document: dict) -> tuple:
+    username = document.get("username")
+    minecraft = document.get("minecraft")
+    minecraft_username = minecraft.get("username") if isinstance(minecraft, dict) else None
+
+    return (
+        normalize_id(document.get("discord_id")),
+        username,
+        (username or "").lower(),
+        minecraft_username,
+        json.dumps(document),
+    )
+
+
+class SQLiteUserStore:
+    """
+    User store backed by a SQLite database in WAL mode.
+
+    Exposes the same methods as `UserStore`. Documents are kept as JSON in
+    the `data` column, and the fields used for lookups and sorting are
+    copied into indexed columns.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the SQLite database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def _one(self, where: str, value) -> dict | None:
+        row = self.connection.execute(
+            f"SELECT data FROM users WHERE {where} = ? ORDER BY id LIMIT 1", (value,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _many(self, sql: str, params: tuple = ()) -> list[dict]:
+        return [json.loads(row[0]) for row in self.connection.execute(sql, params)]
+
+    # LOOKUPS
+    def get_by_discord_id(self, discord_id) -> dict | None:
+        return self._one("discord_id", normalize_id(discord_id))
+
+    def get_by_username(self, username: str) -> dict | None:
+        return self._one("username", username)
+
+    def get_by_minecraft(self, minecraft_username: str) -> dict | None:
+        return self._one("minecraft_username", minecraft_username)
+
+    def get_many_by_minecraft(self, minecraft_usernames) -> dict[str, dict]:
+        usernames = list(dict.fromkeys(minecraft_usernames))
+        found = {}
+
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(usernames), 500):
+            chunk = usernames[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for username, data in self.connection.execute(
+                f"SELECT minecraft_username, data FROM users WHERE minecraft_username IN ({placeholders}) ORDER BY id DESC",
+                chunk,
+            ):
+                found[username] = json.loads(data)
+        return found
+
+    def find(self, query) -> dict | None:
+        """
+        Answers a TinyDB query, using an indexed column when the query is a
+        plain equality test on one and falling back to a scan otherwise.
+        """
+        indexed = indexed_getter(self, query)
+        if indexed:
+            getter, value = indexed
+            return getter(value)
+
+        for row in self.connection.execute("SELECT data FROM users ORDER BY id"):
+            document = json.loads(row[0])
+            if query(document):
+                return document
+        return None
+
+    def discord_ids(self) -> set:
+        return {row[0] for row in self.connection.execute("SELECT discord_id FROM users")}
+
+    def all(self) -> list[dict]:
+        return self._many("SELECT data FROM users ORDER BY id")
+
+    def all_sorted(self) -> list[dict]:
+        return self._many("SELECT data FROM users ORDER BY username_key, id")
+
+    # PAGING
+    def count(self, linked: bool = False) -> int:
+        where = " WHERE minecraft_username IS NOT NULL" if linked else ""
+        return self.connection.execute(f"SELECT COUNT(*) FROM users{where}").fetchone()[0]
+
+    def page(self, offset: int, limit: int, linked: bool = False) -> list[dict]:
+        where = " WHERE minecraft_username IS NOT NULL" if linked else ""
+        return self._many(f"SELECT data FROM users{where} ORDER BY username_key, id LIMIT ? OFFSET ?", (limit, offset))
+
+    def page_after(self, cursor: tuple | None, limit: int, linked: bool = False) -> tuple[list[dict], tuple | None]:
+        conditions = ["minecraft_username IS NOT NULL"] if linked else []
+        params = []
+        if cursor:
+            conditions.append("(username_key, id) > (?, ?)")
+            params += list(cursor)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # One row past the page tells whether there is a next page.
+        rows = self.connection.execute(
+            f"SELECT username_key, id, data FROM users{where} ORDER BY username_key, id LIMIT ?", (*params, limit + 1)
+        ).fetchall()
+
+        next_cursor = tuple(rows[limit - 1][:2]) if len(rows) > limit else None
+        return [json.loads(data) for _, _, data in rows[:limit]], next_cursor
+
+    # WRITES
+    def insert(self, document: dict) -> int:
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO users (discord_id, username, username_key, minecraft_username, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                _columns(document),
+            )
+        return cursor.lastrowid
+
+    def insert_many(self, documents: list[dict]) -> int:
+        """Inserts documents in one transaction, skipping Discord IDs already stored."""
+        with self.connection:
+            cursor = self.connection.executemany(
+                "INSERT OR IGNORE INTO users (discord_id, username, username_key, minecraft_username, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [_columns(document) for document in documents],
+            )
+        return cursor.rowcount
+
+    def update(self, discord_id, fields: dict) -> bool:
+        document = self.get_by_discord_id(discord_id)
+        if document is None:
+            return False
+
+        document.update(fields)
+        with self.connection:
+            self.connection.execute(
+                "UPDATE users SET discord_id = ?, username = ?, username_key = ?, minecraft_username = ?, data = ? "
+                "WHERE discord_id = ?",
+                _columns(document) + (normalize_id(discord_id),),
+            )
+        return True
+
+    def remove_by_username(self, username: str) -> list[int]:
+        with self.connection:
+            ids = [row[0] for row in self.connection.execute(
+                "SELECT id FROM users WHERE username = ? ORDER BY id", (username,)
+            )]
+            self.connection.execute("DELETE FROM users WHERE username = ?", (username,))
+        return ids
+
+    def flush(self) -> bool:
+        # Every write is committed in its own transaction, so nothing is pending.
+        return False
+
+    def close(self):
+        self.connection.close()
+
+
+REGISTRATIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_registrations (
+    discord_identifier TEXT PRIMARY KEY,
+    minecraft_username TEXT,
+    data TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pending_registrations_minecraft_username ON pending_registrations (minecraft_username);
+CREATE INDEX IF NOT EXISTS pending_registrations_expires_at ON pending_registrations (expires_at);
+"""
+
+
+class SQLiteRegistrations:
+    """
+    Pending registrations kept in a SQLite table, so every API worker process
+    sees the same ones. Exposes the methods of `ExpiringMap` the API uses,
+    keyed by Discord identifier and indexed by Minecraft username.
+
+    Expiry uses wall clock time, which all processes share. Expired rows are
+    ignored by reads and deleted on the next `set`.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the SQLite database file, usually the user database's.
+    ttl : float
+        Seconds a registration lives.
+    capacity : int
+        Maximum number of registrations. Adding a new one beyond it raises ExpiringMapFull.
+    on_expire : callable, optional
+        Called with (discord_identifier, registration) for each expired row deleted by this process.
+    """
+
+    def __init__(self, path: str, ttl: float, capacity: int, on_expire=None):
+        self.path = path
+        self.ttl = ttl
+        self.capacity = capacity
+        self.on_expire = on_expire
+
+        # Workers share the file, so wait for each other's write locks instead of failing.
+        self.connection = sqlite3.connect(path, timeout=5.0)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(REGISTRATIONS_SCHEMA)
+
+    def __len__(self) -> int:
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM pending_registrations WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def full(self) -> bool:
+        return len(self) >= self.capacity
+
+    def _expire(self, now: float):
+        rows = self.connection.execute(
+            "DELETE FROM pending_registrations WHERE expires_at <= ? RETURNING discord_identifier, data", (now,)
+        ).fetchall()
+        if self.on_expire:
+            for key, data in rows:
+                self.on_expire(key, json.loads(data))
+
+    def set(self, key, value):
+        now = time.time()
+        with self.connection:
+            self._expire(now)
+            exists = self.connection.execute(
+                "SELECT 1 FROM pending_registrations WHERE discord_identifier = ?", (key,)
+            ).fetchone()
+            if not exists and len(self) >= self.capacity:
+                raise ExpiringMapFull()
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pending_registrations (discord_identifier, minecraft_username, data, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value.get("minecraft_username"), json.dumps(value), now + self.ttl),
+            )
+
+    def _one(self, where: str, value) -> tuple | None:
+        return self.connection.execute(
+            f"SELECT discord_identifier, data FROM pending_registrations WHERE {where} = ? AND expires_at > ? LIMIT 1",
+            (value, time.time()),
+        ).fetchone()
+
+    def get(self, key, default=None):
+        row = self._one("discord_identifier", key)
+        return json.loads(row[1]) if row else default
+
+    def find(self, index_value, default=None):
+        """Returns the registration for the Minecraft username `index_value`."""
+        row = self._one("minecraft_username", index_value)
+        return json.loads(row[1]) if row else default
+
+    def pop(self, key, default=None):
+        with self.connection:
+            row = self.connection.execute(
+                "DELETE FROM pending_registrations WHERE discord_identifier = ? RETURNING data, expires_at", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return default
+        return json.loads(row[0])
+
+    def stop(self):
+        self.connection.close()
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import stat
+import tempfile
+import time
+
+from tinydb.middlewares import Middleware
+from tinydb.storages import Storage
+
+log = logging.getLogger("discord")
+
+
+class AtomicJSONStorage(Storage):
+    """
+    TinyDB storage that writes the whole document to a temporary file in the
+    same directory and renames it over the original, so a crash mid-write
+    never leaves a truncated database behind. The file keeps its permissions
+    across writes, and a new one gets the usual umask default.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the JSON file.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+        self.kwargs = kwargs
+        self.last_write_bytes = 0
+
+        # mkstemp creates files as 0600, so work out what open() would have used.
+        umask = os.umask(0)
+        os.umask(umask)
+        self.default_mode = 0o666 & ~umask
+
+    def _mode(self) -> int:
+        try:
+            return stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            return self.default_mode
+
+    def read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                raw = handle.read()
+        except FileNotFoundError:
+            return None
+
+        return json.loads(raw) if raw.strip() else None
+
+    def write(self, data):
+        payload = json.dumps(data, **self.kwargs).encode("utf-8")
+        directory = os.path.dirname(os.path.abspath(self.path))
+
+        fd, tmp_path = tempfile.mkstemp(prefix=".database-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(payload)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.chmod(tmp_path, self._mode())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.last_write_bytes = len(payload)
+
+
+class WriteBehindMiddleware(Middleware):
+    """
+    Keeps the database in memory and only hands it to the wrapped storage
+    when `flush()` is called or `flush_threshold` writes have piled up.
+
+    Parameters:
+    -----------
+    storage_cls : type
+        The storage class to wrap (e.g. AtomicJSONStorage).
+    flush_threshold : int
+        Number of unflushed writes that forces a flush.
+    """
+
+    def __init__(self, storage_cls, flush_threshold: int = 100):
+        super().__init__(storage_cls)
+        self.flush_threshold = flush_threshold
+        self.cache = None
+        self.dirty = 0
+
+        self.flush_count = 0
+        self.last_flush_seconds = 0.0
+        self.last_flush_bytes = 0
+        self.total_flush_bytes = 0
+
+    def read(self):
+        if self.cache is None:
+            self.cache = self.storage.read()
+        return self.cache
+
+    def write(self, data):
+        self.cache = data
+        self.dirty += 1
+
+        if self.dirty >= self.flush_threshold:
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        Writes pending changes to the wrapped storage.
+
+        Returns:
+        --------
+        bool
+            True if anything was written, False if there was nothing to flush.
+        """
+        if not self.dirty:
+            return False
+
+        pending = self.dirty
+        start = time.perf_counter()
+        self.storage.write(self.cache)
+        self.last_flush_seconds = time.perf_counter() - start
+        self.last_flush_bytes = getattr(self.storage, "last_write_bytes", 0)
+
+        self.dirty = 0
+        self.flush_count += 1
+        self.total_flush_bytes += self.last_flush_bytes
+
+        log.info(
+            f"Flushed {pending} database write(s): "
+            f"{self.last_flush_bytes} bytes in {self.last_flush_seconds * 1000:.1f} ms"
+        )
+        return True
+
+    def close(self):
+        self.flush()
+        self.storage.close()
@@ -0,0 +1,155 @@
+from typing import TYPE_CHECKING
+
+# numpy is imported when the first sample is recorded, so loading the
+# minecraft cog at startup does not pay for it.
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-size ring buffer of (timestamp, value) samples stored in two float64
+    NumPy arrays. Appending overwrites the oldest sample once it is full.
+
+    Parameters:
+    -----------
+    capacity : int
+        Number of samples kept.
+    """
+
+    def __init__(self, capacity: int):
+        import numpy as np
+
+        self.times = np.full(capacity, np.nan)
+        self.values = np.full(capacity, np.nan)
+        self.next = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, timestamp: float, value: float):
+        self.times[self.next] = timestamp
+        self.values[self.next] = value
+        self.next = (self.next + 1) % len(self.times)
+        self.size = min(self.size + 1, len(self.times))
+
+    def oldest(self) -> float:
+        """Timestamp of the oldest sample, or +inf when empty."""
+        if not self.size:
+            return float("inf")
+        return float(self.times[self.next if self.size == len(self.times) else 0])
+
+    def since(self, timestamp: float) -> "np.ndarray":
+        """Values of every sample taken at or after `timestamp`, in no particular order."""
+        return self.values[self.times >= timestamp]
+
+    def between(self, start: float, end: float) -> "np.ndarray":
+        """Values of every sample taken between `start` and `end`, both included."""
+        return self.values[(self.times >= start) & (self.times <= end)]
+
+
+class Series:
+    """
+    One metric kept at two resolutions: every raw sample in `raw`, and means
+    over `bucket_seconds` in `coarse`, which covers a much longer span in the
+    same amount of memory.
+    """
+
+    def __init__(self, raw_capacity: int, coarse_capacity: int, bucket_seconds: float):
+        self.raw = RingBuffer(raw_capacity)
+        self.coarse = RingBuffer(coarse_capacity)
+        self.bucket_seconds = bucket_seconds
+        self.bucket = None
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+
+    def add(self, timestamp: float, value: float):
+        self.raw.append(timestamp, value)
+
+        bucket = int(timestamp // self.bucket_seconds)
+        if bucket != self.bucket:
+            self._close_bucket()
+            self.bucket = bucket
+        self.bucket_sum += value
+        self.bucket_count += 1
+
+    def _close_bucket(self):
+        if self.bucket_count:
+            self.coarse.append(self.bucket * self.bucket_seconds, self.bucket_sum / self.bucket_count)
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+
+    def since(self, timestamp: float) -> "np.ndarray":
+        """
+        Every raw sample since `timestamp`. When the raw buffer has wrapped and
+        no longer reaches back that far, the downsampled means of the buckets
+        that ended before its oldest sample fill in the older part.
+        """
+        import numpy as np
+
+        oldest = self.raw.oldest()
+        if len(self.raw) < len(self.raw.times) or oldest <= timestamp:
+            return self.raw.since(timestamp)
+
+        older = self.coarse.between(timestamp, oldest - self.bucket_seconds)
+        return np.concatenate((older, self.raw.since(timestamp)))
+
+
+class ServerHistory:
+    """
+    TPS, tick time and player count history of the Minecraft server.
+
+    Parameters:
+    -----------
+    raw_capacity : int
+        Raw samples kept per series.
+    coarse_capacity : int
+        Downsampled buckets kept per series.
+    bucket_seconds : float
+        Width of one downsampled bucket.
+    """
+
+    def __init__(self, raw_capacity: int = 1440, coarse_capacity: int = 672, bucket_seconds: float = 900):
+        self.raw_capacity = raw_capacity
+        self.coarse_capacity = coarse_capacity
+        self.bucket_seconds = bucket_seconds
+        self.series: dict[str, Series] = {}
+
+    def _series(self, name: str) -> Series:
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = Series(self.raw_capacity, self.coarse_capacity, self.bucket_seconds)
+        return series
+
+    def record_tps(self, timestamp: float, stats: dict):
+        """Records the output of `parse_tps`."""
+        for dimension, values in stats.items():
+            self._series(f"{dimension} TPS").add(timestamp, values["tps"])
+            self._series(f"{dimension} ms/tick").add(timestamp, values["tick_time"])
+
+    def record_players(self, timestamp: float, count: int):
+        self._series("Players").add(timestamp, count)
+
+    def record_lag(self, timestamp: float, behind_ms: float):
+        """Records a "Can't keep up!" warning from the server log."""
+        self._series("Lag ms behind").add(timestamp, behind_ms)
+
+    def summary(self, since: float) -> list[tuple[str, float, float, float, int]]:
+        """
+        Returns (series, min, mean, p95, samples) for every series with data since `since`.
+        """
+        import numpy as np
+
+        rows = []
+        for name in sorted(self.series, key=lambda name: (name != "Players", name)):
+            values = self.series[name].since(since)
+            if values.size:
+                rows.append((
+                    name,
+                    float(values.min()),
+                    float(values.mean()),
+                    float(np.percentile(values, 95)),
+                    int(values.size),
+                ))
+        return rows
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+
+class TTLCache:
+    """
+    Async cache whose entries expire after `ttl` seconds. Concurrent misses on
+    the same key share one in-flight fetch instead of each running their own.
+
+    Parameters:
+    -----------
+    ttl : float
+        Seconds an entry stays fresh.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.entries: dict = {}
+        self.in_flight: dict[object, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, key, fetch):
+        """
+        Returns the cached value for `key`, awaiting `fetch()` to refresh it
+        when it is missing or expired. If a refresh is already running, waits
+        for that one instead.
+
+        The refresh runs in its own task shared by every caller, so a caller
+        that is cancelled stops waiting without cancelling it for the others.
+        """
+        entry = self.entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        task = self.in_flight.get(key)
+        if task:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self.in_flight[key] = asyncio.get_running_loop().create_task(self._refresh(key, fetch))
+        return await asyncio.shield(task)
+
+    async def _refresh(self, key, fetch):
+        try:
+            value = await fetch()
+            self.put(key, value)
+            return value
+        finally:
+            self.in_flight.pop(key, None)
+
+    def put(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
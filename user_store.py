@@ -0,0 +1,262 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+from tinydb.table import Document, Table
+
+
+def normalize_id(discord_id):
+    """Normalizes a Discord ID so `123` and `"123"` hit the same index slot."""
+    try:
+        return int(discord_id)
+    except (TypeError, ValueError):
+        return discord_id
+
+
+INDEXED_PATHS = {
+    ("discord_id",): "get_by_discord_id",
+    ("username",): "get_by_username",
+    ("minecraft", "username"): "get_by_minecraft",
+}
+
+
+def indexed_getter(store, query):
+    """
+    Returns the store method that answers `query` from an index together with
+    its argument, or None if the query is not an equality test on an indexed
+    field.
+    """
+    hashval = getattr(query, "_hash", None)
+
+    if hashval and hashval[0] == "==" and hashval[1] in INDEXED_PATHS:
+        return getattr(store, INDEXED_PATHS[hashval[1]]), hashval[2]
+    return None
+
+
+def _minecraft_username(document) -> str | None:
+    minecraft = document.get("minecraft")
+    if isinstance(minecraft, dict):
+        return minecraft.get("username")
+    return None
+
+
+def _copy_json(value):
+    """Copies a JSON value, much faster than `copy.deepcopy` since it only knows dicts and lists."""
+    if isinstance(value, dict):
+        return {key: _copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(item) for item in value]
+    return value
+
+
+def _sort_key(document) -> str:
+    return (document.get("username") or "").lower()
+
+
+class UserStore:
+    """
+    In-memory view of the `users` table with hash indexes on `discord_id`,
+    `username` and `minecraft.username`, and sorted (username, doc_id) keys
+    of all users and of the Minecraft-linked ones for paging.
+
+    Every document is read from TinyDB once on start-up. Reads are answered
+    from memory and writes go to both TinyDB and the indexes, so a lookup
+    never has to scan the table. Like TinyDB, lookups return copies, so a
+    caller changing a result cannot put the indexes out of step.
+
+    Parameters:
+    -----------
+    table : tinydb.table.Table
+        The TinyDB table that persists the users.
+    """
+
+    def __init__(self, table: Table):
+        self.table = table
+        self.documents: dict[int, Document] = {}
+        self.by_discord_id: dict = {}
+        self.by_username: defaultdict[str, set[int]] = defaultdict(set)
+        self.by_minecraft: dict[str, int] = {}
+        self.sorted_keys: list[tuple[str, int]] = []
+        self.linked_keys: list[tuple[str, int]] = []
+
+        for document in table.all():
+            self._add(document, keep_sorted=False)
+        self._sort_keys()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    # INDEX MAINTENANCE
+    def _add(self, document: Document, keep_sorted: bool = True):
+        """
+        Indexes a document. Bulk loads pass `keep_sorted=False` and call
+        `_sort_keys` once at the end instead of inserting every key in order.
+        """
+        doc_id = document.doc_id
+        self.documents[doc_id] = document
+
+        add_key = insort if keep_sorted else list.append
+        sort_key = (_sort_key(document), doc_id)
+        add_key(self.sorted_keys, sort_key)
+
+        if "discord_id" in document:
+            self.by_discord_id[normalize_id(document["discord_id"])] = doc_id
+        if "username" in document:
+            self.by_username[document["username"]].add(doc_id)
+
+        minecraft_username = _minecraft_username(document)
+        if minecraft_username is not None:
+            self.by_minecraft[minecraft_username] = doc_id
+            add_key(self.linked_keys, sort_key)
+
+    def _sort_keys(self):
+        self.sorted_keys.sort()
+        self.linked_keys.sort()
+
+    @staticmethod
+    def _remove_key(keys: list, key: tuple):
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
+    def _discard(self, document: Document):
+        doc_id = document.doc_id
+        self.documents.pop(doc_id, None)
+
+        sort_key = (_sort_key(document), doc_id)
+        self._remove_key(self.sorted_keys, sort_key)
+
+        if "discord_id" in document:
+            key = normalize_id(document["discord_id"])
+            if self.by_discord_id.get(key) == doc_id:
+                del self.by_discord_id[key]
+
+        if "username" in document:
+            doc_ids = self.by_username.get(document["username"])
+            if doc_ids is not None:
+                doc_ids.discard(doc_id)
+                if not doc_ids:
+                    del self.by_username[document["username"]]
+
+        minecraft_username = _minecraft_username(document)
+        if minecraft_username is not None:
+            self._remove_key(self.linked_keys, sort_key)
+            if self.by_minecraft.get(minecraft_username) == doc_id:
+                del self.by_minecraft[minecraft_username]
+
+    # LOOKUPS
+    def _copy(self, doc_id: int) -> Document:
+        document = self.documents[doc_id]
+        return Document(_copy_json(document), doc_id)
+
+    def get_by_discord_id(self, discord_id) -> Document | None:
+        doc_id = self.by_discord_id.get(normalize_id(discord_id))
+        return self._copy(doc_id) if doc_id is not None else None
+
+    def get_by_username(self, username: str) -> Document | None:
+        doc_ids = self.by_username.get(username)
+        return self._copy(min(doc_ids)) if doc_ids else None
+
+    def get_by_minecraft(self, minecraft_username: str) -> Document | None:
+        doc_id = self.by_minecraft.get(minecraft_username)
+        return self._copy(doc_id) if doc_id is not None else None
+
+    def get_many_by_minecraft(self, minecraft_usernames) -> dict[str, Document]:
+        return {
+            username: self._copy(self.by_minecraft[username])
+            for username in minecraft_usernames
+            if username in self.by_minecraft
+        }
+
+    def find(self, query) -> Document | None:
+        """
+        Answers a TinyDB query, using an index when the query is a plain
+        equality test on an indexed field and falling back to a scan of the
+        in-memory documents otherwise.
+        """
+        indexed = indexed_getter(self, query)
+        if indexed:
+            getter, value = indexed
+            return getter(value)
+
+        for doc_id in sorted(self.documents):
+            if query(self.documents[doc_id]):
+                return self._copy(doc_id)
+        return None
+
+    def discord_ids(self) -> set:
+        return set(self.by_discord_id)
+
+    def all(self) -> list[Document]:
+        return [self._copy(doc_id) for doc_id in self.documents]
+
+    def all_sorted(self) -> list[Document]:
+        return [self._copy(doc_id) for _, doc_id in self.sorted_keys]
+
+    # PAGING
+    def count(self, linked: bool = False) -> int:
+        return len(self.linked_keys if linked else self.sorted_keys)
+
+    def page(self, offset: int, limit: int, linked: bool = False) -> list[Document]:
+        keys = self.linked_keys if linked else self.sorted_keys
+        return [self._copy(doc_id) for _, doc_id in keys[offset:offset + limit]]
+
+    def page_after(self, cursor: tuple | None, limit: int, linked: bool = False) -> tuple[list[Document], tuple | None]:
+        keys = self.linked_keys if linked else self.sorted_keys
+        start = bisect_right(keys, tuple(cursor)) if cursor else 0
+        page_keys = keys[start:start + limit]
+
+        next_cursor = page_keys[-1] if page_keys and start + limit < len(keys) else None
+        return [self._copy(doc_id) for _, doc_id in page_keys], next_cursor
+
+    # WRITES
+    def insert(self, document: dict) -> int:
+        doc_id = self.table.insert(document)
+        self._add(Document(_copy_json(document), doc_id))
+        return doc_id
+
+    def insert_many(self, documents: list[dict]) -> int:
+        """Inserts documents in one write, skipping Discord IDs already stored."""
+        new_documents = {}
+        for document in documents:
+            key = normalize_id(document.get("discord_id"))
+            if key not in self.by_discord_id and key not in new_documents:
+                new_documents[key] = document
+
+        if not new_documents:
+            return 0
+
+        doc_ids = self.table.insert_multiple(new_documents.values())
+        for doc_id, document in zip(doc_ids, new_documents.values()):
+            self._add(Document(_copy_json(document), doc_id), keep_sorted=False)
+        self._sort_keys()
+        return len(doc_ids)
+
+    def update(self, discord_id, fields: dict) -> bool:
+        doc_id = self.by_discord_id.get(normalize_id(discord_id))
+        if doc_id is None:
+            return False
+        document = self.documents[doc_id]
+
+        self.table.update(fields, doc_ids=[document.doc_id])
+
+        self._discard(document)
+        document.update(fields)
+        self._add(document)
+        return True
+
+    def remove_by_username(self, username: str) -> list[int]:
+        doc_ids = sorted(self.by_username.get(username, ()))
+        if not doc_ids:
+            return []
+
+        removed = self.table.remove(doc_ids=doc_ids)
+        for doc_id in removed:
+            self._discard(self.documents[doc_id])
+        return removed
+
+    def flush(self) -> bool:
+        flush = getattr(self.table.storage, "flush", None)
+        return bool(flush and flush())
+
+    def close(self):
+        self.table.storage.close()
@@ -1,23 +1,21 @@
-import discord
-from typing import Optional, List, Tuple
+from functools import cache
+from typing import Optional, List, Tuple, TYPE_CHECKING
 
-from main import SERVER_ID
-
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
-
-ARGON2 = PasswordHasher()
+# discord, argon2 and main are imported where they are first used, so password
+# workers and table helpers do not pull in the whole bot.
+if TYPE_CHECKING:
+    import discord
 
 def create_embed(
         title: str,
         description: str = "",
-        color: discord.Color = 0x87ceeb,
+        color: "discord.Color" = 0x87ceeb,
         fields: Optional[List[Tuple[str, str, bool]]] = None,  # (name, value, inline)
         footer: Optional[str] = None,
         thumbnail_url: Optional[str] = None,
         author_name: Optional[str] = None,
         author_icon_url: Optional[str] = None,
-    ) -> discord.Embed:
+    ) -> "discord.Embed":
     """
     Creates and returns a Discord Embed with optional customization.
 
@@ -59,6 +57,8 @@ def create_embed(
     )
     await ctx.send(embed=embed)
     """
+    import discord
+
     embed = discord.Embed(
         title=title,
         description=description,
@@ -76,15 +76,97 @@ def create_embed(
         embed.set_thumbnail(url=thumbnail_url)
 
     if author_name:
-        embed.set_author(name=author_name, icon_url=author_icon_url or discord.Embed.Empty)
+        embed.set_author(name=author_name, icon_url=author_icon_url)
 
     return embed
 
+EMBED_DESCRIPTION_LIMIT = 4096
+# Longest Discord username, a handy fixed column width for user tables
+MAX_CELL_WIDTH = 32
+
+def table_widths(columns: list[str], rows, max_cell_width: int | None = None) -> list[int]:
+    """
+    Returns the width of each column: its widest cell or header, capped at
+    `max_cell_width` when one is given.
+    """
+    widths = [len(col) for col in columns]
+
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(str(cell)))
+
+    if max_cell_width is None:
+        return widths
+    return [min(width, max_cell_width) for width in widths]
+
+def table_pages(columns: list[str], rows, spacing: int = 2, limit: int | None = EMBED_DESCRIPTION_LIMIT,
+                widths: list[int] | None = None, max_cell_width: int | None = None):
+    """
+    Yields a table as code-block pages of at most `limit` characters, each with
+    its own header, so every page fits in an embed description.
+
+    Parameters:
+    -----------
+    columns : list of str
+        The column headers (e.g., ["#", "Username", "Discord ID", "Minecraft"])
+    rows : iterable of list
+        The rows of data, where each sublist matches the columns order.
+    spacing : int
+        Spaces between columns.
+    limit : int or None
+        Most characters per page. None puts every row on one page.
+    widths : list of int, optional
+        Column widths. When given, rows are only read as pages are produced;
+        otherwise they are scanned once up front with `table_widths`. Cells
+        wider than their column are cut short with "…".
+    max_cell_width : int, optional
+        Caps the widths worked out from the rows. By default no cell is cut.
+
+    Yields:
+    -------
+    str
+        A page formatted as a code block. An empty table yields one page with just the header.
+    """
+    if widths is None:
+        rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+        widths = table_widths(columns, rows, max_cell_width)
+
+    gap = " " * spacing
+
+    def format_row(row) -> str:
+        cells = []
+        for width, cell in zip(widths, row):
+            cell = str(cell)
+            if len(cell) > width:
+                cell = cell[:width - 1] + "…"
+            cells.append(cell.ljust(width))
+        return gap.join(cells) + "\n"
+
+    head = "```\n" + format_row(columns) + "-" * (sum(widths) + spacing * (len(widths) - 1)) + "\n"
+    tail = "```"
+    empty_size = len(head) + len(tail)
+
+    lines = []
+    size = empty_size
+    for row in rows:
+        line = format_row(row)
+        if lines and limit is not None and size + len(line) > limit:
+            yield head + "".join(lines) + tail
+            lines = []
+            size = empty_size
+        lines.append(line)
+        size += len(line)
+
+    yield head + "".join(lines) + tail
+
 def format_table(columns: list[str], rows: list[list], spacing: int = 2) -> str:
     """
     Formats a list of rows and column headers into a Discord-friendly table string
     using code block formatting. Automatically aligns text by column.
 
+    The whole table is returned as one string; use `table_pages` when it may
+    not fit in a single embed.
+
     Parameters:
     -----------
     columns : list of str
@@ -97,32 +179,17 @@ def format_table(columns: list[str], rows: list[list], spacing: int = 2) -> str:
     str
         A string formatted as a code block representing the table.
     """
-    col_widths = [len(col) for col in columns]
-
-    for row in rows:
-        for i, cell in enumerate(row):
-            cell_str = str(cell)
-            col_widths[i] = max(col_widths[i], len(cell_str))
-
-    table = "```\n"
-
-    header = (" " * spacing).join(f"{col:<{col_widths[i]}}" for i, col in enumerate(columns))
-    table += header + "\n"
-
-    divider = "-" * sum(col_widths) + ("-" * spacing) * (len(columns) - 1)
-    table += divider + "\n"
-
-    for row in rows:
-        row_str = (" " * spacing).join(f"{str(cell):<{col_widths[i]}}" for i, cell in enumerate(row))
-        table += row_str + "\n"
-
-    table += "```"
-    return table
+    return next(table_pages(columns, rows, spacing, limit=None))
 
 def get_guild(bot, guild_id):
     return bot.get_guild(guild_id)
 
 async def get_user_from_target(bot, target):
+        if bot.member_index.built:
+            return bot.member_index.lookup(target)
+
+        from main import SERVER_ID
+
         user = None
 
         if target.isdigit():
@@ -139,15 +206,23 @@ async def get_user_from_target(bot, target):
         return user
 
 # METHODS FOR PASSOWRD HASHING
+@cache
+def password_hasher():
+    from argon2 import PasswordHasher
+
+    return PasswordHasher()
+
 def hash_password(raw_password: str, pepper: str):
     combined = raw_password + pepper
-    hash_value = ARGON2.hash(combined)
+    hash_value = password_hasher().hash(combined)
     
     return hash_value
 
 def verify_password(input_password: str, stored_hash: str, pepper: str) -> bool:
+    from argon2.exceptions import VerifyMismatchError
+
     try:
-        ARGON2.verify(stored_hash, input_password + pepper)
+        password_hasher().verify(stored_hash, input_password + pepper)
         return True
     except VerifyMismatchError:
         return False
\ No newline at end of file